@@ -1,28 +1,293 @@
 from __future__ import annotations
 
 import builtins
+import hashlib
+import io
+import logging
+import math
+import os
 import pickle
 import re
+import struct
+import threading
 import zlib
-from collections.abc import Callable, Iterable
-from random import random
-from time import time
-from typing import Any, Literal, cast
-
+from bisect import bisect, bisect_left
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from random import randint, random
+from time import perf_counter, time
+from types import TracebackType
+from typing import (
+    IO,
+    Any,
+    Concatenate,
+    Literal,
+    NamedTuple,
+    ParamSpec,
+    TypeVar,
+    cast,
+)
+
+from asgiref.sync import sync_to_async
 from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache, default_key_func
-from django.db import connections, router
+from django.db import close_old_connections, connections, router
+from django.db.backends.utils import CursorWrapper
+from django.db.transaction import atomic, on_commit
+from django.dispatch import Signal
 from django.utils.encoding import force_bytes
 from django.utils.module_loading import import_string
 
-from django_mysql.utils import get_list_sql
+from django_mysql.exceptions import TimeoutError
+from django_mysql.locks import Lock
+from django_mysql.status import GlobalStatus
+from django_mysql.utils import StopWatch, WeightedAverageRate, get_list_sql
+
+try:
+    import lz4.frame
+
+    HAVE_LZ4 = True
+except ImportError:  # pragma: no cover
+    HAVE_LZ4 = False
+
+try:
+    import msgpack
+
+    HAVE_MSGPACK = True
+except ImportError:  # pragma: no cover
+    HAVE_MSGPACK = False
+
+try:
+    import orjson
+
+    HAVE_ORJSON = True
+except ImportError:  # pragma: no cover
+    HAVE_ORJSON = False
+
+try:
+    import zstandard
+
+    HAVE_ZSTD = True
+except ImportError:  # pragma: no cover
+    HAVE_ZSTD = False
+
+_EncodedKeyType = Literal["i", "p", "b", "z", "s", "d", "l", "m", "j"]
+_Row = tuple[str, int | bytes, _EncodedKeyType, int]
+
+logger = logging.getLogger(__name__)
+
+# Background cull threads, one per (database alias, table) per process, with
+# events to stop them
+_cull_threads: dict[tuple[str, str], tuple[threading.Thread, threading.Event]] = {}
+_cull_threads_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    # Forked children inherit the registry but not the threads
+    os.register_at_fork(after_in_child=_cull_threads.clear)
+
+# Thread pools for ShardedMySQLCache fan-out, one per shard layout per process
+_shard_executors: dict[tuple[tuple[str, str], ...], ThreadPoolExecutor] = {}
+_shard_executors_lock = threading.Lock()
+
+# Stats for the STATS option, shared by all instances for the same database,
+# table, and key prefix in the process, since Django creates one instance per
+# thread
+_stats: dict[tuple[str, str, str], CacheStats] = {}
+_stats_lock = threading.Lock()
+
+# Local tiers for the LOCAL_MAX_ENTRIES option, shared by all instances for the
+# same database, table, and key prefix in the process, so that a write in one
+# thread invalidates the entries every thread reads
+_local_tiers: dict[tuple[str, str, str], LocalTier] = {}
+_local_tiers_lock = threading.Lock()
 
-_EncodedKeyType = Literal["i", "p", "z"]
+# Sent after each MySQLCache operation when the STATS option is enabled, with
+# the arguments cache, operation, and duration (in seconds)
+cache_operation = Signal()
+
+_T = TypeVar("_T")
+_P = ParamSpec("_P")
 
 BIGINT_SIGNED_MIN = -9223372036854775808
 BIGINT_SIGNED_MAX = 9223372036854775807
 BIGINT_UNSIGNED_MAX = 18446744073709551615
 
 
+def _instrumented(
+    operation: str,
+) -> Callable[
+    [Callable[Concatenate[MySQLCache, _P], _T]],
+    Callable[Concatenate[MySQLCache, _P], _T],
+]:
+    """
+    Record the duration of a MySQLCache method in its stats and send the
+    cache_operation signal, when the STATS option is enabled.
+    """
+
+    def decorator(
+        method: Callable[Concatenate[MySQLCache, _P], _T],
+    ) -> Callable[Concatenate[MySQLCache, _P], _T]:
+        @wraps(method)
+        def wrapper(self: MySQLCache, *args: _P.args, **kwargs: _P.kwargs) -> _T:
+            stats = self._stats
+            if stats is None:
+                return method(self, *args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                duration = perf_counter() - start
+                stats.observe(operation, duration)
+                cache_operation.send(
+                    sender=type(self),
+                    cache=self,
+                    operation=operation,
+                    duration=duration,
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def _lock_name(db: str, kind: str, *parts: str) -> str:
+    """
+    Return a name for a Lock on db, made from a hash of the database name and
+    parts, short enough that with the database name prefix Lock adds, it fits
+    in MySQL's 64 character limit.
+    """
+    db_name = connections[db].settings_dict["NAME"]
+    digest = hashlib.sha1(
+        "\0".join((db_name, *parts)).encode(), usedforsecurity=False
+    ).hexdigest()
+    prefix = f"dm.{kind}."
+    length = 64 - len(Lock.make_name(db, prefix))
+    return prefix + digest[: max(length, 8)]
+
+
+def _random_key_between(low: str, high: str) -> str:
+    """
+    Return a random string between low and high, treating the characters
+    after their common prefix as digits of a number. Non-ASCII characters are
+    clamped, which is fine for choosing where to start sampling from.
+    """
+    prefix_length = 0
+    for low_char, high_char in zip(low, high):
+        if low_char != high_char:
+            break
+        prefix_length += 1
+
+    digits = 8
+
+    def position(key: str) -> int:
+        suffix = key[prefix_length : prefix_length + digits].ljust(digits, "\0")
+        value = 0
+        for char in suffix:
+            value = value * 128 + min(ord(char), 127)
+        return value
+
+    value = randint(position(low), position(high))
+    chars = []
+    for _ in range(digits):
+        value, char = divmod(value, 128)
+        chars.append(chr(char))
+    return low[:prefix_length] + "".join(reversed(chars)).rstrip("\0")
+
+
+def _round_trips(obj: Any, binary: bool) -> bool:
+    """
+    Return whether msgpack, if binary, or otherwise JSON, would decode obj
+    back to an equal object of the same type. That is, whether it's built
+    only from None, bool, int, float, str, list, and dict, without
+    subclasses, plus bytes for msgpack. JSON can't store non-finite floats,
+    and its object keys must be strings.
+    """
+    obj_type = type(obj)
+    if obj is None or obj_type is bool or obj_type is int or obj_type is str:
+        return True
+    if obj_type is float:
+        return binary or math.isfinite(obj)
+    if obj_type is bytes:
+        return binary
+    if obj_type is list:
+        return all(_round_trips(item, binary) for item in obj)
+    if obj_type is dict:
+        return all(
+            (_round_trips(key, binary) if binary else type(key) is str)
+            and _round_trips(value, binary)
+            for key, value in obj.items()
+        )
+    return False
+
+
+def _pack_out_of_band(data: bytes, buffers: list[pickle.PickleBuffer]) -> bytes:
+    """
+    Combine a pickle and its out-of-band buffers into the format for the 'b'
+    value_type: the number of buffers, their lengths, the pickle, and then
+    the buffers.
+    """
+    raws = [buffer.raw() for buffer in buffers]
+    header = struct.pack(f"<I{len(raws)}Q", len(raws), *(raw.nbytes for raw in raws))
+    return b"".join([header, data, *raws])
+
+
+def _loads_out_of_band(value: bytes | memoryview) -> Any:
+    """
+    Unpickle the 'b' value_type format, passing the out-of-band buffers as
+    views of value, so objects such as numpy arrays don't copy their data.
+    """
+    view = memoryview(value)
+    (count,) = struct.unpack_from("<I", view)
+    lengths = struct.unpack_from(f"<{count}Q", view, 4)
+    end = len(view)
+    buffers = []
+    for length in reversed(lengths):
+        buffers.append(view[end - length : end])
+        end -= length
+    buffers.reverse()
+    return pickle.loads(view[4 + 8 * count : end], buffers=buffers)
+
+
+class _ZlibReader(io.RawIOBase):
+    """
+    A file that decompresses zlib data as it's read.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, data: bytes | memoryview) -> None:
+        self._data = memoryview(data)
+        self._position = 0
+        self._decompressor = zlib.decompressobj()
+
+    @classmethod
+    def open(cls, data: bytes | memoryview) -> IO[bytes]:
+        return io.BufferedReader(cls(data))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = len(buffer)
+        data = b""
+        while not data and not self._decompressor.eof:
+            source: bytes | memoryview = self._decompressor.unconsumed_tail
+            if not source:
+                source = self._data[self._position : self._position + self.chunk_size]
+                if not source:
+                    raise zlib.error("Compressed data ended early.")
+                self._position += len(source)
+            data = self._decompressor.decompress(source, size)
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _open_lz4(data: bytes | memoryview) -> IO[bytes]:
+    return cast(IO[bytes], lz4.frame.LZ4FrameFile(io.BytesIO(data)))
+
+
 # Slightly modified copies of Options/BaseDatabaseCache from django's
 # cache.backends.db - these allow us to act like a separate app for database
 # routers (django_mysql), and not appear on django's `createcachetable`
@@ -109,9 +374,27 @@ class MySQLCache(BaseDatabaseCache):
         "    value longblob NOT NULL,\n"
         "    value_type char(1) CHARACTER SET latin1 COLLATE latin1_bin\n"
         "                       NOT NULL DEFAULT 'p',\n"
-        "    expires BIGINT UNSIGNED NOT NULL\n"
+        "    expires BIGINT UNSIGNED NOT NULL,\n"
+        "    KEY expires (expires)\n"
         ");\n"
     )
+
+    # For the HOT_MAX_SIZE option. MEMORY tables store rows at a fixed length
+    # and don't support blobs, so value is a varbinary of the maximum size.
+    # The indexes use BTREE rather than the default HASH, for prefix scans
+    # and culling in order.
+    hot_create_table_sql = (
+        "CREATE TABLE `{table_name}` (\n"
+        "    cache_key varchar(255) CHARACTER SET utf8 COLLATE utf8_bin\n"
+        "                           NOT NULL,\n"
+        "    value varbinary({max_size}) NOT NULL,\n"
+        "    value_type char(1) CHARACTER SET latin1 COLLATE latin1_bin\n"
+        "                       NOT NULL DEFAULT 'p',\n"
+        "    expires BIGINT UNSIGNED NOT NULL,\n"
+        "    PRIMARY KEY (cache_key) USING BTREE,\n"
+        "    KEY expires (expires) USING BTREE\n"
+        ") ENGINE=MEMORY;\n"
+    )
     # fmt: on
 
     @classmethod
@@ -125,8 +408,43 @@ class MySQLCache(BaseDatabaseCache):
         super().__init__(table, params)
         options = params.get("OPTIONS", {})
         self._compress_min_length = options.get("COMPRESS_MIN_LENGTH", 5000)
-        self._compress_level = options.get("COMPRESS_LEVEL", 6)
+        self._batch_max_items = options.get("BATCH_MAX_ITEMS", 1000)
+        self._batch_max_bytes = options.get("BATCH_MAX_BYTES", 1024 * 1024)
+        self._init_codecs(options)
+        self._database: str | None = options.get("DATABASE")
+        self._read_your_writes = int(options.get("READ_YOUR_WRITES", 0) * 1000)
+        self._pinned: OrderedDict[str, int] = OrderedDict()
+        self._pinned_all_until = 0
         self._cull_probability = options.get("CULL_PROBABILITY", 0.01)
+        self._cull_interval = options.get("CULL_INTERVAL", 0)
+        self._approx_count_min_entries = options.get(
+            "APPROX_COUNT_MIN_ENTRIES", 100_000
+        )
+        self._expires_indexed: dict[tuple[str, str], bool] = {}
+        self._quoted_tables: dict[str, list[str]] = {}
+        self._sql_memo: OrderedDict[
+            tuple[str, str, str | None, bool, str, int, int], str
+        ] = OrderedDict()
+        self._hot_max_size = options.get("HOT_MAX_SIZE", 0)
+        if self._hot_max_size and self._hot_max_size < 20:
+            raise ValueError("HOT_MAX_SIZE must be at least 20 bytes, so integers fit.")
+        self._hot_table = f"{table}_hot" if self._hot_max_size else None
+        # The same table on another database, such as for another shard,
+        # holds other rows and generations
+        registry_key = (self._db_for_write(), table, self.key_prefix)
+        self._stats: CacheStats | None = None
+        if options.get("STATS", False):
+            with _stats_lock:
+                self._stats = _stats.setdefault(registry_key, CacheStats())
+        self._local_max_entries = options.get("LOCAL_MAX_ENTRIES", 0)
+        self._local_ttl = int(options.get("LOCAL_TTL", 1) * 1000)
+        with _local_tiers_lock:
+            self._local = _local_tiers.setdefault(registry_key, LocalTier())
+        self._local_sync_interval = int(options.get("LOCAL_SYNC_INTERVAL", 0) * 1000)
+        self._local_generation_keys = [
+            f"{self.key_prefix}:django_mysql_generation:{shard}"
+            for shard in range(self.generation_shards)
+        ]
 
         # Figure out our *reverse* key function
         if self.key_func is default_key_func:
@@ -141,35 +459,145 @@ class MySQLCache(BaseDatabaseCache):
             reverse_key_func = params.get("REVERSE_KEY_FUNCTION")
             self.reverse_key_func = get_reverse_key_func(reverse_key_func)
 
+    def _init_codecs(self, options: dict[str, Any]) -> None:
+        self._serializer = options.get("SERIALIZER", "pickle")
+        if self._serializer not in ("pickle", "msgpack", "json"):
+            raise ValueError(
+                f"Unknown SERIALIZER {self._serializer!r}, should be 'pickle', "
+                "'msgpack', or 'json'."
+            )
+        if self._serializer == "msgpack" and not HAVE_MSGPACK:
+            raise ValueError("SERIALIZER 'msgpack' requires the msgpack package.")
+        if self._serializer == "json" and not HAVE_ORJSON:
+            raise ValueError("SERIALIZER 'json' requires the orjson package.")
+
+        self._compressor = options.get("COMPRESSOR", "zlib")
+        if self._compressor not in ("zlib", "zstd", "lz4"):
+            raise ValueError(
+                f"Unknown COMPRESSOR {self._compressor!r}, should be 'zlib', "
+                "'zstd', or 'lz4'."
+            )
+        if self._compressor == "zstd" and not HAVE_ZSTD:
+            raise ValueError("COMPRESSOR 'zstd' requires the zstandard package.")
+        if self._compressor == "lz4" and not HAVE_LZ4:
+            raise ValueError("COMPRESSOR 'lz4' requires the lz4 package.")
+
+        default_levels = {"zlib": 6, "zstd": 3, "lz4": 0}
+        self._compress_level = options.get(
+            "COMPRESS_LEVEL", default_levels[self._compressor]
+        )
+
+        self._out_of_band_min_length = options.get("OUT_OF_BAND_MIN_LENGTH", 0)
+
+        # Registries of how to read each value_type. Every compressed
+        # value_type holds a compressed pickle. Large ones are unpickled from
+        # a stream, so the whole decompressed pickle is never in memory.
+        self._decompressors: dict[str, Callable[[bytes | memoryview], bytes]] = {
+            "z": zlib.decompress,
+        }
+        self._stream_decompressors: dict[
+            str, Callable[[bytes | memoryview], IO[bytes]]
+        ] = {
+            "z": _ZlibReader.open,
+        }
+        self._deserializers: dict[str, Callable[[bytes | memoryview], Any]] = {
+            "p": pickle.loads,
+            "b": _loads_out_of_band,
+        }
+        if HAVE_LZ4:
+            self._decompressors["l"] = lz4.frame.decompress
+            self._stream_decompressors["l"] = _open_lz4
+        if HAVE_MSGPACK:
+            self._deserializers["m"] = partial(
+                msgpack.unpackb, raw=False, strict_map_key=False
+            )
+        if HAVE_ORJSON:
+            self._deserializers["j"] = orjson.loads
+            # Make orjson reject types it would not decode back to the same
+            # type, so they get pickled instead
+            self._orjson_options = (
+                orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_SUBCLASS
+            )
+
+        zstd_dictionary = options.get("ZSTD_DICTIONARY")
+        if zstd_dictionary is not None and not HAVE_ZSTD:
+            raise ValueError("ZSTD_DICTIONARY requires the zstandard package.")
+        if HAVE_ZSTD:
+            zstd_decompressor = zstandard.ZstdDecompressor()
+            self._decompressors["s"] = zstd_decompressor.decompress
+            self._stream_decompressors["s"] = zstd_decompressor.stream_reader
+            if zstd_dictionary is None:
+                dict_data = None
+            else:
+                dict_data = zstandard.ZstdCompressionDict(zstd_dictionary)
+                zstd_decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+                self._decompressors["d"] = zstd_decompressor.decompress
+                self._stream_decompressors["d"] = zstd_decompressor.stream_reader
+            if self._compressor == "zstd":
+                self._zstd_compressor = zstandard.ZstdCompressor(
+                    level=self._compress_level, dict_data=dict_data
+                )
+                self._zstd_value_type: _EncodedKeyType = (
+                    "s" if dict_data is None else "d"
+                )
+
+    # Compressed values at least this long are decompressed as a stream
+    stream_min_length = 256 * 1024
+
+    # The most SQL statements to memoize, least recently used first out, since
+    # set_many() can build one per batch size up to BATCH_MAX_ITEMS
+    sql_memo_max_entries = 128
+
+    # LOCAL_SYNC_INTERVAL spreads writes over this many generation rows, by
+    # the hash of their keys, so they don't all contend for one row lock
+    generation_shards = 16
+
     # Django API + helpers
 
+    @_instrumented("get")
     def get(
         self, key: str, default: Any | None = None, version: int | None = None
     ) -> Any:
         key = self.make_key(key, version=version)
         self.validate_key(key)
-        db = router.db_for_read(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+
+        self._local_sync()
+        local_row = self._local_get(key)
+        if local_row is not None:
+            if self._stats is not None:
+                self._stats.add(hits=1, local_hits=1)
+            return self.decode(*local_row)
+        local_writes = self._local.writes
+
+        db = self._db_for_read([key])
 
         with connections[db].cursor() as cursor:
-            cursor.execute(self._get_query.format(table=table), (key, self._now()))
+            cursor.execute(*self._union(db, self._get_query, (key, self._now())))
             row = cursor.fetchone()
 
         if row is None:
+            if self._stats is not None:
+                self._stats.add(misses=1)
             return default
         else:
-            value, value_type = row
+            value, value_type, expires = row
+            if self._stats is not None:
+                self._stats.add(hits=1, bytes_read=len(value))
+            self._local_set(key, value, value_type, expires, local_writes)
             return self.decode(value, value_type)
 
     # fmt: off
     _get_query = (
-        "SELECT value, value_type "
+        "SELECT value, value_type, expires "
         "FROM {table} "
         "WHERE cache_key = %s AND "
               "expires >= %s"
     )
     # fmt: on
 
+    @_instrumented("get_many")
     def get_many(
         self, keys: Iterable[str], version: int | None = None
     ) -> dict[str, Any]:
@@ -178,35 +606,64 @@ class MySQLCache(BaseDatabaseCache):
         for key in made_keys:
             self.validate_key(key)
 
-        db = router.db_for_read(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        data = {}
+        bytes_read = 0
+
+        if self._local_max_entries:
+            self._local_sync()
+            remote_keys = []
+            for made_key in made_keys:
+                local_row = self._local_get(made_key)
+                if local_row is None:
+                    remote_keys.append(made_key)
+                else:
+                    data[made_key_to_key[made_key]] = self.decode(*local_row)
+            made_keys = remote_keys
+            if self._stats is not None:
+                self._stats.add(local_hits=len(data))
+            if not made_keys:
+                if self._stats is not None:
+                    self._stats.add(hits=len(data))
+                return data
+        local_writes = self._local.writes
+
+        db = self._db_for_read(made_keys)
 
         with connections[db].cursor() as cursor:
-            cursor.execute(
-                self._get_many_query.format(
-                    table=table, list_sql=get_list_sql(made_keys)
-                ),
-                made_keys + [self._now()],
+            for batch in self._batches(made_keys, len):
+                padded = self._pad(batch)
+                cursor.execute(
+                    *self._union(
+                        db,
+                        self._get_many_query,
+                        padded + [self._now()],
+                        list_size=len(padded),
+                    )
+                )
+                for made_key, value, value_type, expires in cursor.fetchall():
+                    self._local_set(made_key, value, value_type, expires, local_writes)
+                    key = made_key_to_key[made_key]
+                    data[key] = self.decode(value, value_type)
+                    bytes_read += len(value)
+
+        if self._stats is not None:
+            self._stats.add(
+                hits=len(data),
+                misses=len(made_key_to_key) - len(data),
+                bytes_read=bytes_read,
             )
-            rows = cursor.fetchall()
-
-        data = {}
-
-        for made_key, value, value_type in rows:
-            key = made_key_to_key[made_key]
-            data[key] = self.decode(value, value_type)
-
         return data
 
     # fmt: off
     _get_many_query = (
-        "SELECT cache_key, value, value_type "
+        "SELECT cache_key, value, value_type, expires "
         "FROM {table} "
         "WHERE cache_key IN {list_sql} AND "
               "expires >= %s"
     )
     # fmt: on
 
+    @_instrumented("set")
     def set(
         self,
         key: str,
@@ -218,6 +675,7 @@ class MySQLCache(BaseDatabaseCache):
         self.validate_key(key)
         self._base_set("set", key, value, timeout)
 
+    @_instrumented("add")
     def add(
         self,
         key: str,
@@ -236,29 +694,46 @@ class MySQLCache(BaseDatabaseCache):
             raise ValueError("'mode' should be 'set' or 'add'")
 
         exp = self.get_backend_timeout(timeout)
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
 
         self._maybe_cull()
+        self._local_delete(key)
+        self._pin(key)
         with connections[db].cursor() as cursor:
             value, value_type = self.encode(value)
+            row = (key, value, value_type, exp)
+            [(target, other, _)] = self._route(db, [row])
 
             params: tuple[Any, ...]
             if mode == "set":
                 query = self._set_query
-                params = (key, value, value_type, exp)
+                params = row
             else:  # mode = 'add'
+                if other is not None:
+                    # The add query only sees the target table, so check the
+                    # other one first
+                    cursor.execute(
+                        self._sql(db, self._has_key_query, other), (key, self._now())
+                    )
+                    if cursor.fetchone() is not None:
+                        return False
                 query = self._add_query
-                params = (key, value, value_type, exp, self._now())
+                params = (*row, self._now())
 
-            cursor.execute(query.format(table=table), params)
+            cursor.execute(self._sql(db, query, target), params)
 
             if mode == "set":
-                return True
+                inserted = True
             else:  # mode = 'add'
                 # Use a special code in the add query for "did insert"
-                insert_id = cursor.lastrowid
-                return insert_id != 444
+                inserted = cursor.lastrowid != 444
+
+            if inserted and other is not None:
+                # Remove any previous value from the other table
+                cursor.execute(self._sql(db, self._delete_query, other), (key,))
+            self._local_after_write(cursor, table, [key])
+            return inserted
 
     # fmt: off
     _set_many_query = (
@@ -294,6 +769,7 @@ class MySQLCache(BaseDatabaseCache):
     )
     # fmt: on
 
+    @_instrumented("set_many")
     def set_many(
         self,
         data: dict[str, Any],
@@ -301,37 +777,66 @@ class MySQLCache(BaseDatabaseCache):
         version: int | None = None,
     ) -> list[str]:
         exp = self.get_backend_timeout(timeout)
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
 
         self._maybe_cull()
 
-        params: list[Any] = []
+        rows = []
         for key, value in data.items():
             made_key = self.make_key(key, version=version)
             self.validate_key(made_key)
             value, value_type = self.encode(value)
-            params.extend((made_key, value, value_type, exp))
-
-        query = self._set_many_query.replace(
-            "{{VALUES_CLAUSE}}", ",".join("(%s, %s, %s, %s)" for key in data)
-        ).format(table=table)
+            rows.append((made_key, value, value_type, exp))
+            self._local_delete(made_key)
+            self._pin(made_key)
 
         with connections[db].cursor() as cursor:
-            cursor.execute(query, params)
+            for target, other, target_rows in self._route(db, rows):
+                for batch in self._batches(target_rows, self._row_size):
+                    query = self._sql(
+                        db,
+                        self._set_many_query,
+                        target,
+                        values_row="(%s, %s, %s, %s)",
+                        values_size=len(batch),
+                    )
+                    cursor.execute(query, [param for row in batch for param in row])
+                    if other is not None:
+                        batch_keys = self._pad([row[0] for row in batch])
+                        cursor.execute(
+                            self._sql(
+                                db,
+                                self._delete_many_query,
+                                other,
+                                list_size=len(batch_keys),
+                            ),
+                            batch_keys,
+                        )
+            self._local_after_write(cursor, table, [row[0] for row in rows])
         return []
 
+    @staticmethod
+    def _row_size(row: _Row) -> int:
+        made_key, value, value_type, exp = row
+        return len(made_key) + (len(value) if isinstance(value, bytes) else 20)
+
+    @_instrumented("delete")
     def delete(self, key: str, version: int | None = None) -> bool:
         key = self.make_key(key, version=version)
         self.validate_key(key)
+        self._local_delete(key)
+        self._pin(key)
 
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
 
         with connections[db].cursor() as cursor:
-            deleted: int = cursor.execute(
-                self._delete_query.format(table=table), (key,)
+            deleted = sum(
+                cursor.execute(self._sql(db, self._delete_query, each_table), (key,))
+                for each_table in self._table_names(db)
             )
+            self._local_after_write(cursor, table, [key])
         return deleted > 0
 
     # fmt: off
@@ -341,21 +846,31 @@ class MySQLCache(BaseDatabaseCache):
     )
     # fmt: on
 
+    @_instrumented("delete_many")
     def delete_many(self, keys: Iterable[str], version: int | None = None) -> None:
         made_keys = [self.make_key(key, version=version) for key in keys]
         for key in made_keys:
             self.validate_key(key)
+            self._local_delete(key)
+            self._pin(key)
 
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
 
         with connections[db].cursor() as cursor:
-            cursor.execute(
-                self._delete_many_query.format(
-                    table=table, list_sql=get_list_sql(made_keys)
-                ),
-                made_keys,
-            )
+            for batch in self._batches(made_keys, len):
+                padded = self._pad(batch)
+                for each_table in self._table_names(db):
+                    cursor.execute(
+                        self._sql(
+                            db,
+                            self._delete_many_query,
+                            each_table,
+                            list_size=len(padded),
+                        ),
+                        padded,
+                    )
+            self._local_after_write(cursor, table, made_keys)
 
     # fmt: off
     _delete_many_query = (
@@ -364,15 +879,19 @@ class MySQLCache(BaseDatabaseCache):
     )
     # fmt: on
 
+    @_instrumented("has_key")
     def has_key(self, key: str, version: int | None = None) -> bool:
         key = self.make_key(key, version=version)
         self.validate_key(key)
 
-        db = router.db_for_read(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        self._local_sync()
+        if self._local_get(key) is not None:
+            return True
+
+        db = self._db_for_read([key])
 
         with connections[db].cursor() as cursor:
-            cursor.execute(self._has_key_query.format(table=table), (key, self._now()))
+            cursor.execute(*self._union(db, self._has_key_query, (key, self._now())))
             return cursor.fetchone() is not None
 
     # fmt: off
@@ -382,11 +901,148 @@ class MySQLCache(BaseDatabaseCache):
     )
     # fmt: on
 
-    def incr(self, key: str, delta: int = 1, version: int | None = None) -> int:
-        return self._base_delta(key, delta, version, "+")
+    def get_or_set(
+        self,
+        key: str,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> Any:
+        # Like BaseCache.get_or_set(), but use the result of add() to skip
+        # fetching the value again when we stored it.
+        value = self.get(key, self._missing_key, version=version)
+        if value is self._missing_key:
+            if callable(default):
+                default = default()
+            if self.add(key, default, timeout=timeout, version=version):
+                return default
+            # Another caller added a value between the get() and add()
+            return self.get(key, default, version=version)
+        return value
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+        *,
+        beta: float = 1.0,
+        lock: bool = False,
+        lock_wait: float = 10.0,
+        stale_timeout: float = 60.0,
+    ) -> Any:
+        """
+        Like get_or_set(), but protect against cache stampedes. The value is
+        stored alongside the time compute() took and its logical expiry time,
+        and is recomputed early with a probability that rises as the expiry
+        approaches, scaled by the compute time and beta ("XFetch").
+
+        With lock=True, only one process at a time recomputes the value,
+        holding a lock. Others return the stale value if there is one, or
+        otherwise wait up to lock_wait seconds for the lock. Rows are kept for
+        stale_timeout seconds past their logical expiry to serve as stale
+        values. If waiting for the lock times out, compute the value anyway.
+        """
+        entry = self._get_computed(key, version)
+        if entry is not None:
+            value, compute_time, expiry = entry
+            # -log(x) for x in (0, 1] is an exponential distribution with mean
+            # 1, so early refreshes are rare until close to the expiry.
+            if expiry is None or (
+                self._now() - compute_time * beta * math.log(1 - random()) < expiry
+            ):
+                return value
+
+        if not lock:
+            return self._compute_and_set(key, compute, timeout, version, stale_timeout)
+
+        db = self._db_for_write()
+        compute_lock = Lock(
+            self._compute_lock_name(db, key, version),
+            acquire_timeout=0 if entry is not None else lock_wait,
+            using=db,
+        )
+        try:
+            compute_lock.acquire()
+        except TimeoutError:
+            if entry is not None:
+                # Another process is refreshing the value
+                return value
+            # The lock holder is slow or stuck, so don't wait any more
+            return self._compute_and_set(key, compute, timeout, version, stale_timeout)
+
+        try:
+            if entry is None:
+                # Another process might have computed the value whilst we
+                # waited for the lock.
+                entry = self._get_computed(key, version)
+                if entry is not None:
+                    return entry.value
+            return self._compute_and_set(key, compute, timeout, version, stale_timeout)
+        finally:
+            compute_lock.release()
+
+    def _get_computed(self, key: str, version: int | None) -> _ComputedEntry | None:
+        # Values stored by set() or get_or_set(), or in an older format, are
+        # treated as misses
+        entry = self.get(key, version=version)
+        if isinstance(entry, _ComputedEntry):
+            return entry
+        return None
+
+    def _compute_lock_name(self, db: str, key: str, version: int | None) -> str:
+        return _lock_name(db, "compute", self._table, self.make_key(key, version))
+
+    def _compute_and_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        timeout: Any,
+        version: int | None,
+        stale_timeout: float,
+    ) -> Any:
+        start = self._now()
+        value = compute()
+        now = self._now()
+        compute_time = now - start
+
+        # Values in the expires column are milliseconds since unix epoch
+        expiry = self.get_backend_timeout(timeout)
+        if expiry == self.FOREVER_TIMEOUT:
+            self.set(key, _ComputedEntry(value, compute_time, None), None, version)
+        else:
+            self.set(
+                key,
+                _ComputedEntry(value, compute_time, expiry),
+                (expiry - now) / 1000 + stale_timeout,
+                version,
+            )
+        return value
 
-    def decr(self, key: str, delta: int = 1, version: int | None = None) -> int:
-        return self._base_delta(key, delta, version, "-")
+    @_instrumented("incr")
+    def incr(
+        self,
+        key: str,
+        delta: int = 1,
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> int:
+        return self._base_delta(key, delta, version, "+", initial, timeout)
+
+    @_instrumented("decr")
+    def decr(
+        self,
+        key: str,
+        delta: int = 1,
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> int:
+        return self._base_delta(key, delta, version, "-", initial, timeout)
 
     def _base_delta(
         self,
@@ -394,23 +1050,87 @@ class MySQLCache(BaseDatabaseCache):
         delta: int,
         version: int | None,
         operation: Literal["+", "-"],
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
     ) -> int:
         key = self.make_key(key, version=version)
         self.validate_key(key)
+        self._local_delete(key)
+        self._pin(key)
 
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
+        # Integers are always stored in the hot table, if there is one
+        int_table = self._table_names(db)[-1]
 
         with connections[db].cursor() as cursor:
-            updated = cursor.execute(
-                self._delta_query.format(table=table, operation=operation), (delta, key)
-            )
-
-            if not updated:
-                raise ValueError(f"Key '{key}' not found, or not an integer")
+            if initial is None:
+                updated = cursor.execute(
+                    self._sql(db, self._delta_query, int_table, operation=operation),
+                    (delta, key),
+                )
+                if not updated and int_table != table:
+                    # Integers stored before the hot table existed are still
+                    # in the main table
+                    updated = cursor.execute(
+                        self._sql(db, self._delta_query, table, operation=operation),
+                        (delta, key),
+                    )
+
+                if not updated:
+                    raise ValueError(f"Key '{key}' not found, or not an integer")
+            else:
+                if int_table != table:
+                    self._move_integers(cursor, db, [key])
+                new_value = initial + delta if operation == "+" else initial - delta
+                cursor.execute(
+                    self._sql(
+                        db, self._delta_upsert_query, int_table, operation=operation
+                    ),
+                    (
+                        key,
+                        new_value,
+                        self.get_backend_timeout(timeout),
+                        self._now(),
+                        delta,
+                    ),
+                )
 
             # New value stored in insert_id
-            return cursor.lastrowid
+            value: int = cursor.lastrowid
+            if initial is not None and int_table != table:
+                # Remove any non-integer value the upsert replaced
+                cursor.execute(self._sql(db, self._delete_query, table), (key,))
+            self._local_after_write(cursor, table, [key])
+            return value
+
+    def _move_integers(self, cursor: CursorWrapper, db: str, keys: list[str]) -> None:
+        """
+        Copy live integers for keys from the main table to the hot table, so
+        that upserts there continue from integers stored before the hot table
+        existed. The caller deletes them from the main table afterwards.
+        """
+        table, hot_table = self._table_names(db)
+        cursor.execute(
+            self._sql(
+                db,
+                self._move_integers_query.replace("{main_table}", table),
+                hot_table,
+                list_size=len(keys),
+            ),
+            [*keys, self._now()],
+        )
+
+    # fmt: off
+    _move_integers_query = (
+        "INSERT IGNORE INTO {table} (cache_key, value, value_type, expires) "
+        "SELECT cache_key, value, value_type, expires "
+        "FROM {main_table} "
+        "WHERE cache_key IN {list_sql} AND "
+              "value_type = 'i' AND "
+              "expires >= %s"
+    )
+    # fmt: on
 
     # Looks a bit tangled to turn the blob back into an int for updating, but
     # it works. Stores the new value for insert_id() with LAST_INSERT_ID
@@ -427,24 +1147,241 @@ class MySQLCache(BaseDatabaseCache):
     )
     # fmt: on
 
+    # Like _delta_query, but inserts the initial value for missing, expired, or
+    # non-integer keys. MySQL runs the assignments left to right, so the
+    # liveness of the existing row is saved in @tmp_live before expires and
+    # value_type are overwritten.
+    # fmt: off
+    _delta_upsert_query = (
+        "INSERT INTO {table} (cache_key, value, value_type, expires) "
+        "VALUES (%s, LAST_INSERT_ID(%s), 'i', %s) "
+        "ON DUPLICATE KEY UPDATE "
+            "expires=IF("
+                "@tmp_live:=(value_type = 'i' AND expires >= %s), "
+                "expires, "
+                "VALUES(expires)"
+            "), "
+            "value=LAST_INSERT_ID(IF("
+                "@tmp_live, "
+                "CAST(value AS SIGNED INTEGER) {operation} %s, "
+                "VALUES(value)"
+            ")), "
+            "value_type='i'"
+    )
+    # fmt: on
+
+    @_instrumented("incr_many")
+    def incr_many(
+        self,
+        deltas: dict[str, int],
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> dict[str, int]:
+        """
+        Increment many integer keys at once, returning a dict of their new
+        values. If initial is given, missing keys are first set to it,
+        otherwise they raise ValueError and no keys are changed.
+        """
+        return self._base_delta_many(deltas, version, initial, timeout)
+
+    @_instrumented("decr_many")
+    def decr_many(
+        self,
+        deltas: dict[str, int],
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> dict[str, int]:
+        return self._base_delta_many(
+            {key: -delta for key, delta in deltas.items()}, version, initial, timeout
+        )
+
+    def _base_delta_many(
+        self,
+        deltas: dict[str, int],
+        version: int | None,
+        initial: int | None,
+        timeout: Any,
+    ) -> dict[str, int]:
+        made_key_to_key = {self.make_key(key, version=version): key for key in deltas}
+        made_keys = list(made_key_to_key)
+        for made_key in made_keys:
+            self.validate_key(made_key)
+            self._local_delete(made_key)
+            self._pin(made_key)
+
+        if not made_keys:
+            return {}
+
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
+        # Integers are always stored in the hot table, if there is one
+        int_table = self._table_names(db)[-1]
+
+        def update(cursor: CursorWrapper, each_table: str, keys: list[str]) -> None:
+            params: list[Any] = []
+            for made_key in keys:
+                params.extend((made_key, deltas[made_key_to_key[made_key]]))
+            cursor.execute(
+                self._sql(db, self._delta_many_query, each_table, list_size=len(keys)),
+                params + keys,
+            )
+
+        def read(cursor: CursorWrapper, each_table: str, keys: list[str]) -> None:
+            cursor.execute(
+                self._sql(
+                    db, self._get_integers_query, each_table, list_size=len(keys)
+                ),
+                keys,
+            )
+            values.update(
+                (made_key_to_key[made_key], int(value))
+                for made_key, value in cursor.fetchall()
+            )
+
+        # Update then read back the new values, in a transaction so the rows
+        # stay locked in between.
+        padded = self._pad(made_keys)
+        values: dict[str, int] = {}
+        with atomic(using=db), connections[db].cursor() as cursor:
+            if initial is None:
+                update(cursor, int_table, padded)
+            else:
+                if int_table != table:
+                    self._move_integers(cursor, db, padded)
+                params: list[Any] = []
+                exp = self.get_backend_timeout(timeout)
+                for made_key in made_keys:
+                    new_value = initial + deltas[made_key_to_key[made_key]]
+                    params.extend((made_key, new_value, exp))
+                # Not padded, since a repeated row would apply its delta twice
+                cursor.execute(
+                    self._sql(
+                        db,
+                        self._delta_many_upsert_query,
+                        int_table,
+                        values_row="(%s, %s, 'i', %s)",
+                        values_size=len(made_keys),
+                    ),
+                    params + [self._now(), initial],
+                )
+                if int_table != table:
+                    # Remove any non-integer values the upsert replaced
+                    cursor.execute(
+                        self._sql(
+                            db, self._delete_many_query, table, list_size=len(padded)
+                        ),
+                        padded,
+                    )
+
+            read(cursor, int_table, padded)
+            if initial is None and int_table != table and len(values) < len(made_keys):
+                # Integers stored before the hot table existed are still in
+                # the main table
+                remaining = self._pad(
+                    [
+                        made_key
+                        for made_key in made_keys
+                        if made_key_to_key[made_key] not in values
+                    ]
+                )
+                update(cursor, table, remaining)
+                read(cursor, table, remaining)
+
+            if len(values) < len(made_keys):
+                missing = sorted(key for key in deltas if key not in values)
+                raise ValueError(f"Keys {missing!r} not found, or not integers")
+
+            self._local_after_write(cursor, table, made_keys)
+
+        return values
+
+    # fmt: off
+    _delta_many_query = (
+        "UPDATE {table} "
+        "SET value = CAST(value AS SIGNED INTEGER) + CASE cache_key {case_sql} END "
+        "WHERE cache_key IN {list_sql} AND "
+              "value_type = 'i'"
+    )
+
+    _delta_many_upsert_query = (
+        "INSERT INTO {table} (cache_key, value, value_type, expires) "
+        "VALUES {{VALUES_CLAUSE}} "
+        "ON DUPLICATE KEY UPDATE "
+            "expires=IF("
+                "@tmp_live:=(value_type = 'i' AND expires >= %s), "
+                "expires, "
+                "VALUES(expires)"
+            "), "
+            "value=IF("
+                "@tmp_live, "
+                "CAST(value AS SIGNED INTEGER) + "
+                    "CAST(VALUES(value) AS SIGNED INTEGER) - %s, "
+                "VALUES(value)"
+            "), "
+            "value_type='i'"
+    )
+
+    _get_integers_query = (
+        "SELECT cache_key, value FROM {table} "
+        "WHERE cache_key IN {list_sql} AND "
+              "value_type = 'i'"
+    )
+    # fmt: on
+
+    @_instrumented("clear")
     def clear(self) -> None:
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        self._local.clear()
+        self._pin_all()
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
         with connections[db].cursor() as cursor:
-            cursor.execute(f"DELETE FROM {table}")
+            for each_table in self._table_names(db):
+                if self._local_sync_interval:
+                    # Keep the generation rows, so their values never repeat
+                    cursor.execute(
+                        self._sql(
+                            db,
+                            self._clear_query,
+                            each_table,
+                            list_size=self.generation_shards,
+                        ),
+                        self._local_generation_keys,
+                    )
+                else:
+                    cursor.execute(f"DELETE FROM {each_table}")
+            self._local_after_write(cursor, table)
+
+    # fmt: off
+    _clear_query = (
+        "DELETE FROM {table} "
+        "WHERE cache_key NOT IN {list_sql}"
+    )
+    # fmt: on
 
+    @_instrumented("touch")
     def touch(
         self, key: str, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None
     ) -> bool:
         key = self.make_key(key, version=version)
         self.validate_key(key)
+        self._local_delete(key)
+        self._pin(key)
         exp = self.get_backend_timeout(timeout)
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        table = self._table_names(db)[0]
         with connections[db].cursor() as cursor:
-            affected_rows = cursor.execute(
-                self._touch_query.format(table=table), [exp, key, self._now()]
+            affected_rows = sum(
+                cursor.execute(
+                    self._sql(db, self._touch_query, each_table),
+                    [exp, key, self._now()],
+                )
+                for each_table in self._table_names(db)
             )
+            self._local_after_write(cursor, table, [key])
         return affected_rows > 0
 
     # fmt: off
@@ -456,67 +1393,723 @@ class MySQLCache(BaseDatabaseCache):
     )
     # fmt: on
 
-    def validate_key(self, key: str) -> None:
-        """
-        Django normally warns about maximum key length, but we error on it.
-        """
-        if len(key) > 250:
-            raise ValueError(
-                f"Cache key is longer than the maximum 250 characters: {key}"
-            )
-        return super().validate_key(key)
-
-    def encode(self, obj: Any) -> tuple[int | bytes, _EncodedKeyType]:
-        """
-        Take a Python object and return it as a tuple (value, value_type), a
-        blob and a one-char code for what type it is
-        """
-        if self._is_valid_mysql_bigint(obj):
-            return obj, "i"
-
-        value = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
-        value_type: _EncodedKeyType = "p"
-        if self._compress_min_length and len(value) >= self._compress_min_length:
-            value = zlib.compress(value, self._compress_level)
-            value_type = "z"
-        return value, value_type
+    # Async Django API - BaseCache implements these by looping over, or
+    # combining, the other async methods. Instead, serve local tier hits
+    # without leaving the event loop, and otherwise make a single hop to the
+    # sync method, which uses one query.
 
-    def _is_valid_mysql_bigint(self, value: int | bytes) -> bool:
-        return (
-            # Can't support int subclasses since they should are expected to
-            # decode back to the same object
-            type(value) is int
-            # Can't go beyond these ranges
-            and BIGINT_SIGNED_MIN <= value <= BIGINT_SIGNED_MAX
+    async def aget(
+        self, key: str, default: Any | None = None, version: int | None = None
+    ) -> Any:
+        if self._local_max_entries and not self._local_sync_due():
+            made_key = self.make_key(key, version=version)
+            self.validate_key(made_key)
+            local_row = self._local_get(made_key)
+            if local_row is not None:
+                if self._stats is not None:
+                    self._stats.add(hits=1, local_hits=1)
+                return self.decode(*local_row)
+
+        return await sync_to_async(self.get, thread_sensitive=True)(
+            key, default, version
         )
 
-    def decode(self, value: bytes, value_type: _EncodedKeyType) -> Any:
-        """
+    async def aget_many(
+        self, keys: Iterable[str], version: int | None = None
+    ) -> dict[str, Any]:
+        data = {}
+
+        if self._local_max_entries and not self._local_sync_due():
+            remote_keys = []
+            for key in keys:
+                made_key = self.make_key(key, version=version)
+                self.validate_key(made_key)
+                local_row = self._local_get(made_key)
+                if local_row is None:
+                    remote_keys.append(key)
+                else:
+                    data[key] = self.decode(*local_row)
+            if self._stats is not None:
+                self._stats.add(hits=len(data), local_hits=len(data))
+            if not remote_keys:
+                return data
+            keys = remote_keys
+
+        data.update(
+            await sync_to_async(self.get_many, thread_sensitive=True)(keys, version)
+        )
+        return data
+
+    async def ahas_key(self, key: str, version: int | None = None) -> bool:
+        if self._local_max_entries and not self._local_sync_due():
+            made_key = self.make_key(key, version=version)
+            self.validate_key(made_key)
+            if self._local_get(made_key) is not None:
+                return True
+
+        return await sync_to_async(self.has_key, thread_sensitive=True)(key, version)
+
+    async def aset_many(
+        self,
+        data: dict[str, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> list[str]:
+        return await sync_to_async(self.set_many, thread_sensitive=True)(
+            data, timeout, version
+        )
+
+    async def adelete_many(
+        self, keys: Iterable[str], version: int | None = None
+    ) -> None:
+        return await sync_to_async(self.delete_many, thread_sensitive=True)(
+            keys, version
+        )
+
+    async def aget_or_set(
+        self,
+        key: str,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> Any:
+        return await sync_to_async(self.get_or_set, thread_sensitive=True)(
+            key, default, timeout, version
+        )
+
+    async def aincr(
+        self,
+        key: str,
+        delta: int = 1,
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> int:
+        return await sync_to_async(self.incr, thread_sensitive=True)(
+            key, delta, version, initial=initial, timeout=timeout
+        )
+
+    async def adecr(
+        self,
+        key: str,
+        delta: int = 1,
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> int:
+        return await sync_to_async(self.decr, thread_sensitive=True)(
+            key, delta, version, initial=initial, timeout=timeout
+        )
+
+    def validate_key(self, key: str) -> None:
+        """
+        Django normally warns about maximum key length, but we error on it.
+        """
+        if len(key) > 250:
+            raise ValueError(
+                f"Cache key is longer than the maximum 250 characters: {key}"
+            )
+        return super().validate_key(key)
+
+    def encode(self, obj: Any) -> tuple[int | bytes, _EncodedKeyType]:
+        """
+        Take a Python object and return it as a tuple (value, value_type), a
+        blob and a one-char code for what type it is
+        """
+        if self._stats is None:
+            return self._encode(obj)
+
+        start = perf_counter()
+        value, value_type = self._encode(obj)
+        self._stats.add(
+            encode_time=perf_counter() - start,
+            bytes_written=len(value) if isinstance(value, bytes) else 0,
+        )
+        return value, value_type
+
+    def _encode(self, obj: Any) -> tuple[int | bytes, _EncodedKeyType]:
+        if self._is_valid_mysql_bigint(obj):
+            return obj, "i"
+
+        # The alternative serializers can't handle every object, and read
+        # some back as different types, such as tuples as lists, so fall back
+        # to pickle for anything that wouldn't round-trip
+        if self._serializer == "msgpack" and _round_trips(obj, binary=True):
+            try:
+                return msgpack.packb(obj, use_bin_type=True, strict_types=True), "m"
+            except (TypeError, ValueError, OverflowError):
+                pass
+        elif self._serializer == "json" and _round_trips(obj, binary=False):
+            try:
+                return orjson.dumps(obj, option=self._orjson_options), "j"
+            except TypeError:
+                pass
+
+        if self._out_of_band_min_length:
+            buffers: list[pickle.PickleBuffer] = []
+
+            def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+                # Returning True keeps the buffer in the pickle
+                if buffer.raw().nbytes < self._out_of_band_min_length:
+                    return True
+                buffers.append(buffer)
+                return False
+
+            value = pickle.dumps(obj, 5, buffer_callback=buffer_callback)
+            if buffers:
+                return _pack_out_of_band(value, buffers), "b"
+        else:
+            value = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        value_type: _EncodedKeyType = "p"
+        if self._compress_min_length and len(value) >= self._compress_min_length:
+            value, value_type = self._compress(value)
+        return value, value_type
+
+    def _compress(self, value: bytes) -> tuple[bytes, _EncodedKeyType]:
+        compressed: bytes
+        value_type: _EncodedKeyType
+        if self._compressor == "zstd":
+            compressed = self._zstd_compressor.compress(value)
+            value_type = self._zstd_value_type
+        elif self._compressor == "lz4":
+            compressed = lz4.frame.compress(
+                value, compression_level=self._compress_level
+            )
+            value_type = "l"
+        else:
+            compressed = zlib.compress(value, self._compress_level)
+            value_type = "z"
+
+        if self._stats is not None:
+            self._stats.add(
+                compress_input_bytes=len(value), compress_output_bytes=len(compressed)
+            )
+        return compressed, value_type
+
+    def _is_valid_mysql_bigint(self, value: int | bytes) -> bool:
+        return (
+            # Can't support int subclasses since they should are expected to
+            # decode back to the same object
+            type(value) is int
+            # Can't go beyond these ranges
+            and BIGINT_SIGNED_MIN <= value <= BIGINT_SIGNED_MAX
+        )
+
+    def decode(
+        self, value: bytes | memoryview | str, value_type: _EncodedKeyType
+    ) -> Any:
+        """
         Take a value blob and its value_type one-char code and convert it back
         to a python object
         """
+        if self._stats is None:
+            return self._decode(value, value_type)
+
+        start = perf_counter()
+        try:
+            return self._decode(value, value_type)
+        finally:
+            self._stats.add(decode_time=perf_counter() - start)
+
+    def _decode(
+        self, value: bytes | memoryview | str, value_type: _EncodedKeyType
+    ) -> Any:
         if value_type == "i":
             return int(value)
 
-        raw_value: bytes
-        if value_type == "z":
-            raw_value = zlib.decompress(value)
+        # Use buffers from the driver as they are, to avoid copying them
+        raw_value: bytes | memoryview
+        if isinstance(value, str):
+            raw_value = force_bytes(value)
+        else:
+            raw_value = value
+
+        decompress = self._decompressors.get(value_type)
+        if decompress is not None:
+            if len(raw_value) >= self.stream_min_length:
+                with self._stream_decompressors[value_type](raw_value) as stream:
+                    return pickle.load(stream)
+            raw_value = decompress(raw_value)
             value_type = "p"
+
+        try:
+            deserialize = self._deserializers[value_type]
+        except KeyError:
+            raise ValueError(
+                f"Unknown value_type {value_type!r} read from the cache table."
+            ) from None
+        return deserialize(raw_value)
+
+    def _local_get(self, key: str) -> tuple[Any, _EncodedKeyType] | None:
+        """
+        Return the (value, value_type) pair for a made key from the local tier,
+        or None if it isn't there or has expired.
+        """
+        if not self._local_max_entries:
+            return None
+
+        local = self._local
+        with local.lock:
+            try:
+                value, value_type, expires = local.entries[key]
+            except KeyError:
+                return None
+
+            if expires < self._now():
+                del local.entries[key]
+                return None
+
+            local.entries.move_to_end(key)
+        return value, value_type
+
+    def _local_set(
+        self,
+        key: str,
+        value: Any,
+        value_type: _EncodedKeyType,
+        expires: int,
+        local_writes: int,
+    ) -> None:
+        """
+        Store a row read from the table in the local tier, unless a write in
+        this process has dropped entries since local_writes was taken before
+        the read, as the row might predate it.
+        """
+        if not self._local_max_entries:
+            return
+
+        # Never hold an entry past either the row's own expiry or LOCAL_TTL,
+        # which bounds how stale a value written by another process can get
+        local = self._local
+        with local.lock:
+            if local.writes != local_writes:
+                return
+            local.entries[key] = (
+                value,
+                value_type,
+                min(expires, self._now() + self._local_ttl),
+            )
+            local.entries.move_to_end(key)
+            while len(local.entries) > self._local_max_entries:
+                local.entries.popitem(last=False)
+
+    def _local_delete(self, key: str) -> None:
+        if not self._local_max_entries:
+            return
+
+        local = self._local
+        with local.lock:
+            local.writes += 1
+            local.entries.pop(key, None)
+
+    def _local_after_write(
+        self, cursor: CursorWrapper, table: str, keys: list[str] | None = None
+    ) -> None:
+        """
+        After writing keys, or every key if keys is None, drop their local
+        entries again once the write commits, since a read in another thread
+        may have stored the old rows since the drop before the write, and bump
+        their generation rows.
+        """
+        if self._local_max_entries:
+            on_commit(partial(self._local_drop, keys), using=cursor.db.alias)
+        self._local_bump_generation(cursor, table, keys)
+
+    def _local_drop(self, keys: list[str] | None) -> None:
+        local = self._local
+        with local.lock:
+            local.writes += 1
+            if keys is None:
+                local.entries.clear()
+            else:
+                for key in keys:
+                    local.entries.pop(key, None)
+
+    def _local_sync_due(self) -> bool:
+        return bool(
+            self._local_max_entries
+            and self._local_sync_interval
+            and self._now() >= self._local.next_sync
+        )
+
+    def _local_sync(self) -> None:
+        """
+        Poll the generation rows at most once per LOCAL_SYNC_INTERVAL, and drop
+        the local entries in each shard that another process has written to
+        since the last poll.
+        """
+        if not self._local_sync_due():
+            return
+        self._local.next_sync = self._now() + self._local_sync_interval
+
+        db = self._db_for_read()
+
+        with connections[db].cursor() as cursor:
+            cursor.execute(
+                self._sql(
+                    db,
+                    self._generations_query,
+                    list_size=self.generation_shards,
+                ),
+                self._local_generation_keys,
+            )
+            rows = dict(cursor.fetchall())
+
+        generations = [int(rows.get(key, 0)) for key in self._local_generation_keys]
+        local = self._local
+        with local.lock:
+            if local.generations is None:
+                # Entries read before the first poll might be of any age
+                local.entries.clear()
+            else:
+                changed = {
+                    shard
+                    for shard, generation in enumerate(generations)
+                    if generation != local.generations[shard]
+                }
+                if changed:
+                    for key in [
+                        key
+                        for key in local.entries
+                        if self._generation_shard(key) in changed
+                    ]:
+                        del local.entries[key]
+            local.generations = generations
+
+    # fmt: off
+    _generations_query = (
+        "SELECT cache_key, value "
+        "FROM {table} "
+        "WHERE cache_key IN {list_sql}"
+    )
+    # fmt: on
+
+    def _generation_shard(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % self.generation_shards
+
+    def _local_bump_generation(
+        self, cursor: CursorWrapper, table: str, keys: Iterable[str] | None = None
+    ) -> None:
+        """
+        Increment the generation rows for the shards of keys, or every shard
+        if keys is None, after a write, so that other processes drop their
+        local entries in those shards on their next poll.
+        """
+        if not self._local_sync_interval:
+            return
+
+        if keys is None:
+            shards = list(range(self.generation_shards))
         else:
-            raw_value = force_bytes(value)
+            # Sorted, so concurrent writes lock the rows in the same order
+            shards = sorted({self._generation_shard(key) for key in keys})
+        if not shards:
+            return
+
+        cursor.execute(
+            self._sql(
+                cursor.db.alias,
+                self._generation_bump_query,
+                table,
+                values_row="(%s, LAST_INSERT_ID(%s), 'i', %s)",
+                values_size=len(shards),
+            ),
+            [
+                param
+                for shard in shards
+                for param in (
+                    self._local_generation_keys[shard],
+                    # Start from the time, like CacheNamespace, so that if
+                    # the row is culled, its new value won't repeat an old one
+                    self._now(),
+                    self.FOREVER_TIMEOUT,
+                )
+            ],
+        )
+        if len(shards) > 1:
+            # The new generations aren't all known, so the next poll drops
+            # the entries in these shards, even if only we wrote to them.
+            return
+
+        [shard] = shards
+        generation = cursor.lastrowid
+        local = self._local
+        with local.lock:
+            if (
+                local.generations is not None
+                and generation == local.generations[shard] + 1
+            ):
+                # Only our own write happened since the last poll, so our
+                # local entries are still valid.
+                local.generations[shard] = generation
+
+    # Like _delta_query, but creates the rows if they don't exist yet. The new
+    # generation of the last row is stored for insert_id() with LAST_INSERT_ID
+    # fmt: off
+    _generation_bump_query = (
+        "INSERT INTO {table} (cache_key, value, value_type, expires) "
+        "VALUES {{VALUES_CLAUSE}} "
+        "ON DUPLICATE KEY UPDATE "
+            "value = LAST_INSERT_ID(CAST(value AS SIGNED INTEGER) + 1), "
+            "value_type = 'i', "
+            "expires = VALUES(expires)"
+    )
+    # fmt: on
+
+    def _batches(
+        self, items: list[_T], size: Callable[[_T], int]
+    ) -> Generator[list[_T]]:
+        """
+        Split items into batches of at most BATCH_MAX_ITEMS items and, unless
+        a single item is bigger, BATCH_MAX_BYTES bytes, as measured by size().
+        """
+        batch: list[_T] = []
+        batch_bytes = 0
+        for item in items:
+            item_bytes = size(item)
+            if batch and (
+                len(batch) >= self._batch_max_items
+                or batch_bytes + item_bytes > self._batch_max_bytes
+            ):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(item)
+            batch_bytes += item_bytes
+        if batch:
+            yield batch
+
+    def _table_names(self, db: str) -> list[str]:
+        """
+        Return the quoted names of the table and, if HOT_MAX_SIZE is set, the
+        hot table, in that order.
+        """
+        try:
+            return self._quoted_tables[db]
+        except KeyError:
+            pass
+        quote_name = connections[db].ops.quote_name
+        tables = [quote_name(self._table)]
+        if self._hot_table is not None:
+            tables.append(quote_name(self._hot_table))
+        self._quoted_tables[db] = tables
+        return tables
+
+    def _sql(
+        self,
+        db: str,
+        query: str,
+        table: str | None = None,
+        *,
+        union: bool = False,
+        operation: str = "",
+        list_size: int = 0,
+        values_row: str = "",
+        values_size: int = 0,
+    ) -> str:
+        """
+        Return query formatted for table, which defaults to the main table,
+        or for every table combined with UNION ALL. {list_sql} and {case_sql}
+        get list_size placeholders, and {{VALUES_CLAUSE}} values_size copies
+        of values_row. The most recently used statements are memoized, so
+        most calls skip building them.
+        """
+        memo_key = (db, query, table, union, operation, list_size, values_size)
+        try:
+            sql = self._sql_memo[memo_key]
+        except KeyError:
+            pass
+        else:
+            self._sql_memo.move_to_end(memo_key)
+            return sql
+
+        if values_size:
+            query = query.replace(
+                "{{VALUES_CLAUSE}}", ",".join([values_row] * values_size)
+            )
+        kwargs = {
+            "operation": operation,
+            "list_sql": "(" + ",".join(["%s"] * list_size) + ")",
+            "case_sql": " ".join(["WHEN %s THEN %s"] * list_size),
+        }
+        if union:
+            sql = " UNION ALL ".join(
+                query.format(table=each_table, **kwargs)
+                for each_table in self._table_names(db)
+            )
+        else:
+            sql = query.format(table=table or self._table_names(db)[0], **kwargs)
 
-        if value_type == "p":
-            return pickle.loads(raw_value)
+        # Don't memoize unbatched statements, since their sizes are unbounded
+        if max(list_size, values_size) <= self._batch_max_items:
+            self._sql_memo[memo_key] = sql
+            if len(self._sql_memo) > self.sql_memo_max_entries:
+                self._sql_memo.popitem(last=False)
+        return sql
 
-        raise ValueError(
-            f"Unknown value_type {value_type!r} read from the cache table."
+    def _pad(self, keys: list[str]) -> list[str]:
+        """
+        Pad a non-empty list of keys for an IN list to the next power of two,
+        up to BATCH_MAX_ITEMS, by repeating the last key. This way, lists of
+        similar lengths share a memoized statement.
+        """
+        size = len(keys)
+        padded_size = min(
+            1 << (size - 1).bit_length(), max(size, self._batch_max_items)
         )
+        return keys + [keys[-1]] * (padded_size - size)
+
+    def _union(
+        self, db: str, query: str, params: Iterable[Any], list_size: int = 0
+    ) -> tuple[str, list[Any]]:
+        """
+        Return the SQL and params to run query against every table, combined
+        with UNION ALL.
+        """
+        sql = self._sql(db, query, union=True, list_size=list_size)
+        return sql, list(params) * len(self._table_names(db))
+
+    def _create_table_sqls(self) -> dict[str, str]:
+        """
+        Return the CREATE TABLE statements for the table and any hot table.
+        """
+        sqls = {self._table: self.create_table_sql.format(table_name=self._table)}
+        if self._hot_table is not None:
+            sqls[self._hot_table] = self.hot_create_table_sql.format(
+                table_name=self._hot_table, max_size=self._hot_max_size
+            )
+        return sqls
+
+    def _route(
+        self, db: str, rows: list[_Row]
+    ) -> list[tuple[str, str | None, list[_Row]]]:
+        """
+        Split rows by the table they belong in, by the size of their encoded
+        value. Return (table, other table, rows) triples, where other table is
+        where stale copies of the keys need deleting from.
+        """
+        tables = self._table_names(db)
+        if self._hot_table is None:
+            return [(tables[0], None, rows)]
+
+        table, hot_table = tables
+        rows_by_table: dict[str, list[_Row]] = {table: [], hot_table: []}
+        for row in rows:
+            value = row[1]
+            if isinstance(value, int) or len(value) <= self._hot_max_size:
+                rows_by_table[hot_table].append(row)
+            else:
+                rows_by_table[table].append(row)
+        return [
+            (target, hot_table if target == table else table, target_rows)
+            for target, target_rows in rows_by_table.items()
+            if target_rows
+        ]
+
+    def _db_for_read(self, keys: Iterable[str] = ()) -> str:
+        if self._database is not None:
+            return self._database
+        if self._read_your_writes and self._is_pinned(keys):
+            return self._db_for_write()
+        return router.db_for_read(self.cache_model_class)
+
+    def _db_for_write(self) -> str:
+        if self._database is not None:
+            return self._database
+        return router.db_for_write(self.cache_model_class)
+
+    def _pin(self, key: str) -> None:
+        """
+        Send reads of key to the write database for READ_YOUR_WRITES.
+        """
+        if not self._read_your_writes:
+            return
+
+        now = self._now()
+        # Pins are added in order of expiry, so prune from the front
+        while self._pinned and next(iter(self._pinned.values())) <= now:
+            self._pinned.popitem(last=False)
+        self._pinned[key] = now + self._read_your_writes
+        self._pinned.move_to_end(key)
+
+    def _pin_all(self) -> None:
+        if self._read_your_writes:
+            self._pinned_all_until = self._now() + self._read_your_writes
+
+    def _is_pinned(self, keys: Iterable[str]) -> bool:
+        now = self._now()
+        if self._pinned_all_until > now:
+            return True
+        return any(self._pinned.get(key, 0) > now for key in keys)
 
     def _maybe_cull(self) -> None:
+        if self._cull_interval:
+            self._start_cull_thread()
+            return
+
         # Roll the dice, if it says yes then cull
         if self._cull_probability and random() <= self._cull_probability:
             self.cull()
 
+    def _start_cull_thread(self) -> None:
+        db = self._db_for_write()
+        thread_key = (db, self._table)
+        if self._cull_thread_alive(thread_key):
+            return
+
+        with _cull_threads_lock:
+            if self._cull_thread_alive(thread_key):
+                return
+            stopped = threading.Event()
+            thread = threading.Thread(
+                target=self._cull_loop,
+                args=(db, stopped),
+                name=f"django-mysql cull {self._table}",
+                daemon=True,
+            )
+            _cull_threads[thread_key] = (thread, stopped)
+            thread.start()
+
+    @staticmethod
+    def _cull_thread_alive(thread_key: tuple[str, str]) -> bool:
+        try:
+            thread, _ = _cull_threads[thread_key]
+        except KeyError:
+            return False
+        return thread.is_alive()
+
+    def _cull_loop(self, db: str, stopped: threading.Event) -> None:
+        # Jitter so processes started together don't all try at once
+        while not stopped.wait(self._cull_interval * (0.5 + random())):
+            try:
+                self._background_cull(db)
+            except Exception:
+                logger.exception("Error culling MySQLCache table %r", self._table)
+            finally:
+                # Don't hold a connection open whilst sleeping
+                connections[db].close()
+
+    def _cull_lock_name(self, db: str) -> str:
+        return _lock_name(db, "cull", self._table)
+
+    def _background_cull(self, db: str) -> int | None:
+        """
+        Run cull_chunked() if no other process is culling the same table,
+        returning the number of rows deleted, or None if skipped.
+        """
+        lock = Lock(self._cull_lock_name(db), acquire_timeout=0, using=db)
+        try:
+            lock.acquire()
+        except TimeoutError:
+            return None
+
+        try:
+            return self.cull_chunked()
+        finally:
+            lock.release()
+
     def get_backend_timeout(self, timeout: Any = DEFAULT_TIMEOUT) -> int:
         if timeout is None:
             return self.FOREVER_TIMEOUT
@@ -525,6 +2118,63 @@ class MySQLCache(BaseDatabaseCache):
 
     # Our API extensions
 
+    def get_stats(self, reset: bool = False) -> dict[str, Any]:
+        """
+        Return the counters and latency histograms collected with the STATS
+        option, optionally resetting them.
+        """
+        if self._stats is None:
+            raise ValueError("Set the STATS option to collect stats.")
+        return self._stats.snapshot(reset=reset)
+
+    def namespace(self, name: str) -> CacheNamespace:
+        """
+        Return a view of the cache that prefixes keys with name and a
+        generation number, so invalidate() can drop them all in one query.
+        """
+        return CacheNamespace(self, name)
+
+    def batch(self) -> CacheBatch:
+        """
+        Return a context manager that collects get() calls, and fetches them
+        all with a single get_many() when the first result is needed, or on
+        exit.
+        """
+        return CacheBatch(self)
+
+    def train_zstd_dictionary(
+        self, sample_size: int = 10000, dict_size: int = 112640
+    ) -> bytes:
+        """
+        Train a zstd dictionary on a sample of the pickled values in the table,
+        for use with the ZSTD_DICTIONARY option.
+        """
+        if not HAVE_ZSTD:
+            raise ValueError("train_zstd_dictionary() requires the zstandard package.")
+
+        db = self._db_for_read()
+        table = connections[db].ops.quote_name(self._table)
+        value_types = ["p", *self._decompressors]
+
+        with connections[db].cursor() as cursor:
+            cursor.execute(
+                f"""SELECT value, value_type FROM {table}
+                   WHERE value_type IN {get_list_sql(value_types)}
+                   LIMIT %s""",
+                (*value_types, sample_size),
+            )
+            rows = cursor.fetchall()
+
+        samples = []
+        for value, value_type in rows:
+            raw_value = force_bytes(value)
+            if value_type != "p":
+                raw_value = self._decompressors[value_type](raw_value)
+            samples.append(raw_value)
+
+        return zstandard.train_dictionary(dict_size, samples).as_bytes()
+
+    @_instrumented("keys_with_prefix")
     def keys_with_prefix(
         self, prefix: str, version: int | None = None
     ) -> builtins.set[str]:
@@ -537,17 +2187,20 @@ class MySQLCache(BaseDatabaseCache):
         if version is None:
             version = self.version
 
-        db = router.db_for_read(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        # Any write might have matched the prefix
+        db = self._db_for_read(self._pinned)
 
         prefix = self.make_key(prefix + "%", version=version)
 
         with connections[db].cursor() as cursor:
             cursor.execute(
-                f"""SELECT cache_key FROM {table}
-                   WHERE cache_key LIKE %s AND
-                         expires >= %s""",
-                (prefix, self._now()),
+                *self._union(
+                    db,
+                    """SELECT cache_key FROM {table}
+                       WHERE cache_key LIKE %s AND
+                             expires >= %s""",
+                    (prefix, self._now()),
+                )
             )
             rows = cursor.fetchall()
             full_keys = {row[0] for row in rows}
@@ -558,6 +2211,7 @@ class MySQLCache(BaseDatabaseCache):
                 keys[key] = key_version
             return set(keys)
 
+    @_instrumented("get_with_prefix")
     def get_with_prefix(
         self, prefix: str, version: int | None = None
     ) -> dict[str, Any]:
@@ -570,18 +2224,21 @@ class MySQLCache(BaseDatabaseCache):
         if version is None:
             version = self.version
 
-        db = router.db_for_read(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        # Any write might have matched the prefix
+        db = self._db_for_read(self._pinned)
 
         prefix = self.make_key(prefix + "%", version=version)
 
         with connections[db].cursor() as cursor:
             cursor.execute(
-                f"""SELECT cache_key, value, value_type
-                   FROM {table}
-                   WHERE cache_key LIKE %s AND
-                         expires >= %s""",
-                (prefix, self._now()),
+                *self._union(
+                    db,
+                    """SELECT cache_key, value, value_type
+                       FROM {table}
+                       WHERE cache_key LIKE %s AND
+                             expires >= %s""",
+                    (prefix, self._now()),
+                )
             )
             rows = cursor.fetchall()
 
@@ -592,25 +2249,143 @@ class MySQLCache(BaseDatabaseCache):
 
             return data
 
+    def iter_with_prefix(
+        self, prefix: str, version: int | None = None, batch_size: int = 1000
+    ) -> Generator[tuple[str, Any]]:
+        """
+        Like get_with_prefix(), but yield (key, value) pairs in key order,
+        fetching batch_size rows per query, so only one batch is in memory.
+        """
+        reverse_key_func = self._require_reverse_key_func()
+        for made_key, value, value_type in self._iter_prefix_rows(
+            "cache_key, value, value_type", prefix, version, batch_size
+        ):
+            key, key_prefix, key_version = reverse_key_func(made_key)
+            yield key, self.decode(value, value_type)
+
+    def iter_keys_with_prefix(
+        self, prefix: str, version: int | None = None, batch_size: int = 1000
+    ) -> Generator[str]:
+        """
+        Like keys_with_prefix(), but yield the keys in order, fetching
+        batch_size keys per query.
+        """
+        reverse_key_func = self._require_reverse_key_func()
+        for (made_key,) in self._iter_prefix_rows(
+            "cache_key", prefix, version, batch_size
+        ):
+            yield reverse_key_func(made_key)[0]
+
+    def _require_reverse_key_func(self) -> Callable[[str], tuple[str, str, int]]:
+        if self.reverse_key_func is None:
+            raise ValueError(
+                "To use the _with_prefix commands with a custom KEY_FUNCTION, "
+                "you need to specify a custom REVERSE_KEY_FUNCTION too."
+            )
+        return self.reverse_key_func
+
+    def _iter_prefix_rows(
+        self, columns: str, prefix: str, version: int | None, batch_size: int
+    ) -> Generator[tuple[Any, ...]]:
+        """
+        Yield rows for the unexpired keys matching prefix, paginating over the
+        primary key. The first column must be cache_key.
+        """
+        if version is None:
+            version = self.version
+
+        like = self.make_key(prefix + "%", version=version)
+        now = self._now()
+        last_key: str | None = None
+        while True:
+            db = self._db_for_read(self._pinned)
+            after_sql = "" if last_key is None else "AND cache_key > %s"
+            after_params = () if last_key is None else (last_key,)
+            query = f"""SELECT {columns} FROM {{table}}
+                       WHERE cache_key LIKE %s AND
+                             expires >= %s
+                             {after_sql}
+                       ORDER BY cache_key
+                       LIMIT %s"""
+            params = [like, now, *after_params, batch_size]
+            tables = self._table_names(db)
+            if len(tables) == 1:
+                sql = query.format(table=tables[0])
+            else:
+                # Merge the batches from each table
+                sql = " UNION ALL ".join(
+                    f"({query.format(table=table)})" for table in tables
+                )
+                sql += " ORDER BY cache_key LIMIT %s"
+                params = params * len(tables) + [batch_size]
+
+            with connections[db].cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_key = rows[-1][0]
+
+    @_instrumented("count_with_prefix")
+    def count_with_prefix(self, prefix: str, version: int | None = None) -> int:
+        if version is None:
+            version = self.version
+
+        db = self._db_for_read(self._pinned)
+
+        prefix = self.make_key(prefix + "%", version=version)
+
+        with connections[db].cursor() as cursor:
+            cursor.execute(
+                *self._union(
+                    db,
+                    """SELECT COUNT(*) FROM {table}
+                       WHERE cache_key LIKE %s AND
+                             expires >= %s""",
+                    (prefix, self._now()),
+                )
+            )
+            return sum(row[0] for row in cursor.fetchall())
+
+    @_instrumented("delete_with_prefix")
     def delete_with_prefix(self, prefix: str, version: int | None = None) -> int:
         if version is None:
             version = self.version
 
-        db = router.db_for_write(self.cache_model_class)
+        self._local.clear()
+        self._pin_all()
+
+        db = self._db_for_write()
         table = connections[db].ops.quote_name(self._table)
 
         prefix = self.make_key(prefix + "%", version=version)
 
         with connections[db].cursor() as cursor:
-            return cursor.execute(
-                f"""DELETE FROM {table}
-                   WHERE cache_key LIKE %s""",
-                (prefix,),
+            num_deleted = sum(
+                cursor.execute(
+                    f"""DELETE FROM {each_table}
+                       WHERE cache_key LIKE %s""",
+                    (prefix,),
+                )
+                for each_table in self._table_names(db)
             )
+            self._local_after_write(cursor, table)
+            return num_deleted
 
+    @_instrumented("cull")
     def cull(self) -> int:
-        db = router.db_for_write(self.cache_model_class)
-        table = connections[db].ops.quote_name(self._table)
+        db = self._db_for_write()
+        num_deleted = self._cull_table(db, self._table)
+        if self._hot_table is not None:
+            num_deleted += self._cull_table(db, self._hot_table)
+        if self._stats is not None:
+            self._stats.add(culled=num_deleted)
+        return num_deleted
+
+    def _cull_table(self, db: str, table_name: str) -> int:
+        table = connections[db].ops.quote_name(table_name)
 
         with connections[db].cursor() as cursor:
             # First, try just deleting expired keys
@@ -623,8 +2398,7 @@ class MySQLCache(BaseDatabaseCache):
             if self._max_entries == -1:
                 return 0
 
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            num = cursor.fetchone()[0]
+            num = self._count_rows(cursor, table_name)
 
             if num < self._max_entries:
                 return num_deleted
@@ -632,6 +2406,14 @@ class MySQLCache(BaseDatabaseCache):
             # Now do a key-based cull
             if self._cull_frequency == 0:
                 num_deleted += cursor.execute(f"DELETE FROM {table}")
+            elif self._has_expires_index(cursor, db, table_name):
+                # Evict the keys that would expire soonest
+                num_deleted += cursor.execute(
+                    f"""DELETE FROM {table}
+                       ORDER BY expires
+                       LIMIT %s""",
+                    (num // self._cull_frequency,),
+                )
             else:
                 cull_num = num // self._cull_frequency
                 cursor.execute(
@@ -647,3 +2429,1032 @@ class MySQLCache(BaseDatabaseCache):
                     (max_key,),
                 )
             return num_deleted
+
+    @_instrumented("cull_chunked")
+    def cull_chunked(
+        self,
+        *,
+        time_budget: float | None = None,
+        chunk_time: float = 0.5,
+        chunk_max: int = 10000,
+        status_thresholds: dict[str, int | float] | None = None,
+    ) -> int:
+        """
+        Perform the same deletions as cull(), in a series of small statements.
+        Each chunk is sized to take about chunk_time seconds, and waits for the
+        database load to drop below status_thresholds first. If time_budget
+        seconds pass, or the load stays high for the rest of the budget (or
+        for 60 seconds without one), stop early and leave the rest for the
+        next cull.
+        """
+        db = self._db_for_write()
+        deadline = None if time_budget is None else time() + time_budget
+        num_deleted = 0
+        for table_name in (self._table, self._hot_table):
+            if table_name is not None:
+                num_deleted += self._cull_chunked_table(
+                    db, table_name, deadline, chunk_time, chunk_max, status_thresholds
+                )
+        if self._stats is not None:
+            self._stats.add(culled=num_deleted)
+        return num_deleted
+
+    def _cull_chunked_table(
+        self,
+        db: str,
+        table_name: str,
+        deadline: float | None,
+        chunk_time: float,
+        chunk_max: int,
+        status_thresholds: dict[str, int | float] | None,
+    ) -> int:
+        table = connections[db].ops.quote_name(table_name)
+
+        status = GlobalStatus(db)
+        rate = WeightedAverageRate(chunk_time)
+        chunk_size = 100
+        num_deleted = 0
+
+        def wait_for_low_load() -> bool:
+            """
+            Wait for the database load to drop, for at most the rest of the
+            time budget. Return False if we ran out of time.
+            """
+            if deadline is None:
+                timeout = 60.0
+            else:
+                timeout = deadline - time()
+                # A timeout of 0 would wait forever
+                if timeout <= 0:
+                    return False
+            try:
+                status.wait_until_load_low(status_thresholds, timeout=timeout)
+            except TimeoutError:
+                return False
+            return True
+
+        def delete_chunks(
+            where_sql: str,
+            params: tuple[Any, ...],
+            order_by: str,
+            max_rows: int | None = None,
+        ) -> bool:
+            """
+            Repeatedly delete chunk_size rows matching where_sql, in order_by
+            order, until there are none left or max_rows have been deleted.
+            Return False if we ran out of time.
+            """
+            nonlocal chunk_size, num_deleted
+            remaining = max_rows
+            while True:
+                if not wait_for_low_load():
+                    return False
+
+                limit = chunk_size if remaining is None else min(chunk_size, remaining)
+                with StopWatch() as timer, connections[db].cursor() as cursor:
+                    chunk_deleted = cursor.execute(
+                        f"""DELETE FROM {table} {where_sql}
+                           ORDER BY {order_by} LIMIT %s""",
+                        (*params, limit),
+                    )
+                num_deleted += chunk_deleted
+                if remaining is not None:
+                    remaining -= chunk_deleted
+                if chunk_deleted < limit or remaining == 0:
+                    return True
+                chunk_size = max(
+                    min(rate.update(chunk_deleted, timer.total_time), chunk_max), 1
+                )
+
+        with connections[db].cursor() as cursor:
+            has_expires_index = self._has_expires_index(cursor, db, table_name)
+
+        now = self._now()
+        if has_expires_index:
+            if not delete_chunks("WHERE expires < %s", (now,), "expires"):
+                return num_deleted
+        else:
+            # Without an index, deleting expired rows with a LIMIT would scan
+            # the table from the start every time. Instead, walk it in primary
+            # key ranges.
+            last_key: str | None = None
+            while True:
+                if not wait_for_low_load():
+                    return num_deleted
+
+                with StopWatch() as timer, connections[db].cursor() as cursor:
+                    lower_sql = "" if last_key is None else "cache_key > %s AND"
+                    lower_params = () if last_key is None else (last_key,)
+
+                    # Find the last key of this chunk - if there is none, fewer
+                    # than chunk_size keys remain, so delete up to the end.
+                    cursor.execute(
+                        f"""SELECT cache_key FROM {table}
+                           WHERE {lower_sql} TRUE
+                           ORDER BY cache_key LIMIT 1 OFFSET %s""",
+                        (*lower_params, chunk_size - 1),
+                    )
+                    row = cursor.fetchone()
+                    upper_sql = "" if row is None else "cache_key <= %s AND"
+                    upper_params = () if row is None else (row[0],)
+
+                    num_deleted += cursor.execute(
+                        f"""DELETE FROM {table}
+                           WHERE {lower_sql} {upper_sql} expires < %s""",
+                        (*lower_params, *upper_params, now),
+                    )
+
+                if row is None:
+                    break
+                last_key = row[0]
+                chunk_size = max(
+                    min(rate.update(chunk_size, timer.total_time), chunk_max), 1
+                )
+
+        # -1 means "Don't limit size"
+        if self._max_entries == -1:
+            return num_deleted
+
+        with connections[db].cursor() as cursor:
+            num = self._count_rows(cursor, table_name)
+
+            if num < self._max_entries:
+                return num_deleted
+
+            if not has_expires_index and self._cull_frequency != 0:
+                cull_num = num // self._cull_frequency
+                cursor.execute(
+                    f"""SELECT cache_key FROM {table}
+                       ORDER BY cache_key
+                       LIMIT 1 OFFSET %s""",
+                    (cull_num,),
+                )
+                max_key = cursor.fetchone()[0]
+
+        # Now do a key-based cull
+        if self._cull_frequency == 0:
+            delete_chunks("", (), "cache_key")
+        elif has_expires_index:
+            # Evict the keys that would expire soonest
+            delete_chunks("", (), "expires", num // self._cull_frequency)
+        else:
+            delete_chunks("WHERE cache_key < %s", (max_key,), "cache_key")
+
+        return num_deleted
+
+    # Upper bounds of the expiry horizon buckets for analyze(), in seconds
+    expiry_horizons = (
+        ("1 minute", 60),
+        ("1 hour", 60 * 60),
+        ("1 day", 24 * 60 * 60),
+        ("1 week", 7 * 24 * 60 * 60),
+        ("longer", math.inf),
+    )
+
+    def analyze(
+        self, sample_size: int = 10_000, separator: str = ":"
+    ) -> dict[str, Any]:
+        """
+        Estimate what the table holds from a sample of about sample_size rows,
+        fetched with random seeks into the primary key rather than a full
+        scan. Keys are grouped by KEY_PREFIX, version, and their text up to
+        the first separator. Keys that the reverse key function can't parse,
+        such as LOCAL_SYNC_INTERVAL's generation rows, are grouped together
+        with None for all three.
+        """
+        reverse_key_func = self._require_reverse_key_func()
+        db = self._db_for_read()
+        now = self._now()
+
+        estimated_rows = 0
+        data_bytes = 0
+        rows: list[tuple[str, str, int, int]] = []
+        with connections[db].cursor() as cursor:
+            tables = []
+            for table_name in (self._table, self._hot_table):
+                if table_name is None:
+                    continue
+                table = connections[db].ops.quote_name(table_name)
+                cursor.execute(
+                    """SELECT TABLE_ROWS, DATA_LENGTH
+                       FROM INFORMATION_SCHEMA.TABLES
+                       WHERE TABLE_SCHEMA = DATABASE() AND
+                             TABLE_NAME = %s""",
+                    (table_name,),
+                )
+                table_rows, table_bytes = cursor.fetchone()
+                # TABLE_ROWS is only an estimate for InnoDB, so count exactly
+                # when the table might fit in the sample.
+                cursor.execute(
+                    f"""SELECT COUNT(*) FROM (
+                           SELECT 1 FROM {table} LIMIT %s
+                       ) AS head""",
+                    (sample_size + 1,),
+                )
+                head_rows = cursor.fetchone()[0]
+                small = head_rows <= sample_size
+                if not small:
+                    head_rows = max(int(table_rows or 0), head_rows)
+                tables.append((table_name, head_rows, small))
+                estimated_rows += head_rows
+                data_bytes += int(table_bytes or 0)
+
+            for table_name, table_rows, small in tables:
+                if small:
+                    rows.extend(self._sample_rows(cursor, table_name, None))
+                else:
+                    # Split the sample between the tables by their size
+                    table_sample_size = math.ceil(
+                        sample_size * table_rows / estimated_rows
+                    )
+                    rows.extend(
+                        self._sample_rows(cursor, table_name, table_sample_size)
+                    )
+
+        expired = 0
+        groups: dict[tuple[str | None, int | None, str | None], list[int]] = {}
+        sizes: dict[str, list[int]] = {}
+        horizons = dict.fromkeys(
+            ["expired", *(name for name, seconds in self.expiry_horizons), "never"],
+            0,
+        )
+        for made_key, value_type, size, expires in rows:
+            group_key: tuple[str | None, int | None, str | None]
+            try:
+                key, key_prefix, version = reverse_key_func(made_key)
+            except Exception:
+                # Not made by make_key()
+                group_key = (None, None, None)
+            else:
+                group_key = (key_prefix, version, key.partition(separator)[0])
+            group = groups.setdefault(group_key, [0, 0, 0])
+            group[0] += 1
+            group[1] += size
+            sizes.setdefault(value_type, []).append(size)
+
+            if expires < now:
+                expired += 1
+                group[2] += 1
+                horizons["expired"] += 1
+            elif expires == self.FOREVER_TIMEOUT:
+                horizons["never"] += 1
+            else:
+                name = next(
+                    name
+                    for name, seconds in self.expiry_horizons
+                    if expires - now <= seconds * 1000
+                )
+                horizons[name] += 1
+
+        for type_sizes in sizes.values():
+            type_sizes.sort()
+
+        sampled = len(rows)
+        scale = estimated_rows / sampled if sampled else 0
+        return {
+            "estimated_rows": estimated_rows,
+            "data_bytes": data_bytes,
+            "sampled_rows": sampled,
+            "expired_fraction": expired / sampled if sampled else 0.0,
+            "groups": [
+                {
+                    "key_prefix": key_prefix,
+                    "version": version,
+                    "prefix": prefix,
+                    "sampled_rows": count,
+                    "estimated_rows": round(count * scale),
+                    "mean_size": total_size / count,
+                    "expired_fraction": group_expired / count,
+                }
+                for (key_prefix, version, prefix), (
+                    count,
+                    total_size,
+                    group_expired,
+                ) in sorted(groups.items(), key=lambda item: -item[1][0])
+            ],
+            "value_sizes": {
+                value_type: {
+                    "count": len(type_sizes),
+                    "mean": sum(type_sizes) / len(type_sizes),
+                    "min": type_sizes[0],
+                    "median": type_sizes[len(type_sizes) // 2],
+                    "p90": type_sizes[int(len(type_sizes) * 0.9)],
+                    "max": type_sizes[-1],
+                }
+                for value_type, type_sizes in sorted(sizes.items())
+            },
+            "expiry_horizons": horizons,
+        }
+
+    def _sample_rows(
+        self, cursor: CursorWrapper, table_name: str, sample_size: int | None
+    ) -> list[tuple[str, str, int, int]]:
+        """
+        Return (cache_key, value_type, value size, expires) for about
+        sample_size rows, fetched in runs of consecutive keys starting from
+        random points between the smallest and largest keys. If sample_size is
+        None, return every row.
+        """
+        table = cursor.db.ops.quote_name(table_name)
+        select_sql = (
+            f"SELECT cache_key, value_type, LENGTH(value), expires FROM {table}"
+        )
+
+        if sample_size is None:
+            cursor.execute(select_sql)
+            return list(cursor.fetchall())
+
+        cursor.execute(f"SELECT MIN(cache_key), MAX(cache_key) FROM {table}")
+        min_key, max_key = cursor.fetchone()
+        if min_key is None:
+            return []
+
+        run_size = 100
+        rows = {}
+        for _ in range(math.ceil(sample_size / run_size)):
+            cursor.execute(
+                f"""{select_sql}
+                   WHERE cache_key >= %s
+                   ORDER BY cache_key
+                   LIMIT %s""",
+                (_random_key_between(min_key, max_key), run_size),
+            )
+            for row in cursor.fetchall():
+                rows[row[0]] = row
+        return list(rows.values())
+
+    def _count_rows(self, cursor: CursorWrapper, table_name: str) -> int:
+        """
+        Count the rows in the table, using InnoDB's estimate for tables with a
+        large MAX_ENTRIES, where COUNT(*) would be slow.
+        """
+        if (
+            self._approx_count_min_entries != -1
+            and self._max_entries >= self._approx_count_min_entries
+        ):
+            cursor.execute(
+                """SELECT TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES
+                   WHERE TABLE_SCHEMA = DATABASE() AND
+                         TABLE_NAME = %s""",
+                (table_name,),
+            )
+            row = cursor.fetchone()
+            if row is not None and row[0] is not None:
+                return int(row[0])
+
+        table = cursor.db.ops.quote_name(table_name)
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+    def _has_expires_index(
+        self, cursor: CursorWrapper, db: str, table_name: str
+    ) -> bool:
+        """
+        Check whether the table has the index on expires from create_table_sql,
+        which older tables lack. Cached per database.
+        """
+        if (db, table_name) not in self._expires_indexed:
+            cursor.execute(
+                """SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS
+                   WHERE TABLE_SCHEMA = DATABASE() AND
+                         TABLE_NAME = %s AND
+                         COLUMN_NAME = 'expires' AND
+                         SEQ_IN_INDEX = 1
+                   LIMIT 1""",
+                (table_name,),
+            )
+            self._expires_indexed[db, table_name] = cursor.fetchone() is not None
+        return self._expires_indexed[db, table_name]
+
+
+class ShardedMySQLCache(BaseCache):
+    """
+    Spreads keys over several MySQLCache tables, possibly in different
+    databases, using consistent hashing so that adding or removing a shard
+    only moves a proportional share of the keys.
+    """
+
+    # Points per shard on the hash ring - more gives a more even spread
+    ring_points = 100
+
+    def __init__(self, table: str, params: dict[str, Any]) -> None:
+        super().__init__(params)
+        options = dict(params.get("OPTIONS", {}))
+        shard_configs = options.pop("SHARDS", None)
+        if not shard_configs:
+            raise ValueError(
+                "ShardedMySQLCache requires the SHARDS option, a list of dicts "
+                "with a DATABASE and/or LOCATION for each shard."
+            )
+        self._shard_workers = options.pop("SHARD_WORKERS", 0)
+
+        self.shards: list[MySQLCache] = []
+        ring = []
+        for shard_config in shard_configs:
+            shard_table = shard_config.get("LOCATION", table)
+            shard_options = {**options, "DATABASE": shard_config.get("DATABASE")}
+            shard = MySQLCache(
+                shard_table,
+                {**params, "LOCATION": shard_table, "OPTIONS": shard_options},
+            )
+            self.shards.append(shard)
+            for point in range(self.ring_points):
+                ring.append(
+                    (self._hash(f"{shard._database}/{shard_table}/{point}"), shard)
+                )
+        ring.sort(key=lambda item: item[0])
+        self._ring_hashes = [hash_ for hash_, shard in ring]
+        self._ring_shards = [shard for hash_, shard in ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        digest = hashlib.md5(value.encode(), usedforsecurity=False).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def _shard_for(self, key: str, version: int | None = None) -> MySQLCache:
+        made_key = self.make_key(key, version=version)
+        index = bisect(self._ring_hashes, self._hash(made_key))
+        return self._ring_shards[index % len(self._ring_shards)]
+
+    def _group_by_shard(
+        self, keys: Iterable[str], version: int | None
+    ) -> dict[MySQLCache, list[str]]:
+        groups: dict[MySQLCache, list[str]] = {}
+        for key in keys:
+            groups.setdefault(self._shard_for(key, version), []).append(key)
+        return groups
+
+    def _fan_out(
+        self, func: Callable[[MySQLCache, Any], Any], groups: dict[MySQLCache, Any]
+    ) -> list[Any]:
+        """
+        Call func(shard, arg) for each shard in groups, concurrently if
+        SHARD_WORKERS is set, and return the results. Run serially when the
+        caller is in a transaction on any shard's database, since worker
+        threads have their own connections.
+        """
+        if (
+            not self._shard_workers
+            or len(groups) < 2
+            or any(
+                connections[shard._db_for_write()].in_atomic_block for shard in groups
+            )
+        ):
+            return [func(shard, arg) for shard, arg in groups.items()]
+
+        futures = [
+            self._executor().submit(self._run_in_worker, func, shard, arg)
+            for shard, arg in groups.items()
+        ]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _run_in_worker(
+        func: Callable[[MySQLCache, Any], Any], shard: MySQLCache, arg: Any
+    ) -> Any:
+        # Worker threads don't get the request_started and request_finished
+        # signals that manage connections, so do their job here: the pool's
+        # threads keep their connections between tasks, closing them once
+        # past CONN_MAX_AGE or after an error, as for a request.
+        close_old_connections()
+        try:
+            return func(shard, arg)
+        finally:
+            close_old_connections()
+
+    def _executor_layout(self) -> tuple[tuple[str, str], ...]:
+        return tuple((shard._database or "", shard._table) for shard in self.shards)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        layout = self._executor_layout()
+        if layout not in _shard_executors:
+            with _shard_executors_lock:
+                if layout not in _shard_executors:
+                    _shard_executors[layout] = ThreadPoolExecutor(
+                        max_workers=self._shard_workers,
+                        thread_name_prefix="django-mysql shard",
+                    )
+        return _shard_executors[layout]
+
+    def _all_shards(self, func: Callable[[MySQLCache], Any]) -> list[Any]:
+        return self._fan_out(lambda shard, arg: func(shard), dict.fromkeys(self.shards))
+
+    # Django API
+
+    def get(
+        self, key: str, default: Any | None = None, version: int | None = None
+    ) -> Any:
+        return self._shard_for(key, version).get(key, default, version)
+
+    def get_many(
+        self, keys: Iterable[str], version: int | None = None
+    ) -> dict[str, Any]:
+        data = {}
+        results = self._fan_out(
+            lambda shard, keys: shard.get_many(keys, version),
+            self._group_by_shard(keys, version),
+        )
+        for result in results:
+            data.update(result)
+        return data
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> None:
+        self._shard_for(key, version).set(key, value, timeout, version)
+
+    def add(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> bool:
+        return self._shard_for(key, version).add(key, value, timeout, version)
+
+    def set_many(
+        self,
+        data: dict[str, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> list[str]:
+        groups = {
+            shard: {key: data[key] for key in keys}
+            for shard, keys in self._group_by_shard(data, version).items()
+        }
+        failed_keys = []
+        for result in self._fan_out(
+            lambda shard, data: shard.set_many(data, timeout, version), groups
+        ):
+            failed_keys.extend(result)
+        return failed_keys
+
+    def delete(self, key: str, version: int | None = None) -> bool:
+        return self._shard_for(key, version).delete(key, version)
+
+    def delete_many(self, keys: Iterable[str], version: int | None = None) -> None:
+        self._fan_out(
+            lambda shard, keys: shard.delete_many(keys, version),
+            self._group_by_shard(keys, version),
+        )
+
+    def has_key(self, key: str, version: int | None = None) -> bool:
+        return self._shard_for(key, version).has_key(key, version)
+
+    def get_or_set(
+        self,
+        key: str,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> Any:
+        return self._shard_for(key, version).get_or_set(key, default, timeout, version)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        return self._shard_for(key, version).get_or_compute(
+            key, compute, timeout, version, **kwargs
+        )
+
+    def incr(
+        self,
+        key: str,
+        delta: int = 1,
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> int:
+        return self._shard_for(key, version).incr(
+            key, delta, version, initial=initial, timeout=timeout
+        )
+
+    def decr(
+        self,
+        key: str,
+        delta: int = 1,
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> int:
+        return self._shard_for(key, version).decr(
+            key, delta, version, initial=initial, timeout=timeout
+        )
+
+    def touch(
+        self, key: str, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None
+    ) -> bool:
+        return self._shard_for(key, version).touch(key, timeout, version)
+
+    def clear(self) -> None:
+        self._all_shards(lambda shard: shard.clear())
+
+    def incr_many(
+        self,
+        deltas: dict[str, int],
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> dict[str, int]:
+        # Atomic per shard only
+        groups = {
+            shard: {key: deltas[key] for key in keys}
+            for shard, keys in self._group_by_shard(deltas, version).items()
+        }
+        values = {}
+        for result in self._fan_out(
+            lambda shard, deltas: shard.incr_many(
+                deltas, version, initial=initial, timeout=timeout
+            ),
+            groups,
+        ):
+            values.update(result)
+        return values
+
+    def decr_many(
+        self,
+        deltas: dict[str, int],
+        version: int | None = None,
+        *,
+        initial: int | None = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ) -> dict[str, int]:
+        return self.incr_many(
+            {key: -delta for key, delta in deltas.items()},
+            version,
+            initial=initial,
+            timeout=timeout,
+        )
+
+    # Our API extensions
+
+    def namespace(self, name: str) -> CacheNamespace:
+        return CacheNamespace(self, name)
+
+    def keys_with_prefix(
+        self, prefix: str, version: int | None = None
+    ) -> builtins.set[str]:
+        keys: builtins.set[str] = builtins.set()
+        for result in self._all_shards(
+            lambda shard: shard.keys_with_prefix(prefix, version)
+        ):
+            keys |= result
+        return keys
+
+    def get_with_prefix(
+        self, prefix: str, version: int | None = None
+    ) -> dict[str, Any]:
+        data = {}
+        for result in self._all_shards(
+            lambda shard: shard.get_with_prefix(prefix, version)
+        ):
+            data.update(result)
+        return data
+
+    def iter_with_prefix(
+        self, prefix: str, version: int | None = None, batch_size: int = 1000
+    ) -> Generator[tuple[str, Any]]:
+        # Shard by shard, so not in overall key order
+        for shard in self.shards:
+            yield from shard.iter_with_prefix(prefix, version, batch_size)
+
+    def iter_keys_with_prefix(
+        self, prefix: str, version: int | None = None, batch_size: int = 1000
+    ) -> Generator[str]:
+        for shard in self.shards:
+            yield from shard.iter_keys_with_prefix(prefix, version, batch_size)
+
+    def count_with_prefix(self, prefix: str, version: int | None = None) -> int:
+        return sum(
+            self._all_shards(lambda shard: shard.count_with_prefix(prefix, version))
+        )
+
+    def delete_with_prefix(self, prefix: str, version: int | None = None) -> int:
+        return sum(
+            self._all_shards(lambda shard: shard.delete_with_prefix(prefix, version))
+        )
+
+    def cull(self) -> int:
+        return sum(self._all_shards(lambda shard: shard.cull()))
+
+    def cull_chunked(
+        self,
+        *,
+        time_budget: float | None = None,
+        chunk_time: float = 0.5,
+        chunk_max: int = 10000,
+        status_thresholds: dict[str, int | float] | None = None,
+    ) -> int:
+        # Shards are culled one after another, sharing the time budget
+        start_time = time()
+        num_deleted = 0
+        for shard in self.shards:
+            num_deleted += shard.cull_chunked(
+                time_budget=(
+                    None if time_budget is None else time_budget - (time() - start_time)
+                ),
+                chunk_time=chunk_time,
+                chunk_max=chunk_max,
+                status_thresholds=status_thresholds,
+            )
+        return num_deleted
+
+
+class DeferredValue:
+    """
+    The result of a CacheBatch.get() call. Accessing .value resolves the batch
+    if it hasn't been already.
+    """
+
+    __slots__ = ("_batch", "_key", "_version", "_default")
+
+    def __init__(self, batch: CacheBatch, key: str, version: int, default: Any) -> None:
+        self._batch = batch
+        self._key = key
+        self._version = version
+        self._default = default
+
+    @property
+    def value(self) -> Any:
+        return self._batch._result(self._key, self._version, self._default)
+
+
+class CacheBatch:
+    def __init__(self, cache: MySQLCache) -> None:
+        self.cache = cache
+        # Pending keys per version, as dicts to preserve order
+        self._pending: dict[int, dict[str, None]] = {}
+        self._resolved: builtins.set[tuple[str, int]] = builtins.set()
+        self._results: dict[tuple[str, int], Any] = {}
+
+    def __enter__(self) -> CacheBatch:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        exc_traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.resolve()
+
+    def get(
+        self, key: str, default: Any | None = None, version: int | None = None
+    ) -> DeferredValue:
+        if version is None:
+            version = self.cache.version
+        if (key, version) not in self._resolved:
+            self._pending.setdefault(version, {})[key] = None
+        return DeferredValue(self, key, version, default)
+
+    def resolve(self) -> None:
+        pending, self._pending = self._pending, {}
+        for version, keys in pending.items():
+            data = self.cache.get_many(keys, version=version)
+            for key in keys:
+                self._resolved.add((key, version))
+                if key in data:
+                    self._results[(key, version)] = data[key]
+
+    def _result(self, key: str, version: int, default: Any) -> Any:
+        if (key, version) not in self._resolved:
+            self.resolve()
+        return self._results.get((key, version), default)
+
+
+class CacheNamespace:
+    """
+    A view of a cache where every key is prefixed with the namespace name and
+    its current generation, an integer stored in the cache. Incrementing the
+    generation orphans every key in the namespace at once, leaving the old rows
+    to expire or be culled.
+
+    The generation is read once, on first use, and kept for the lifetime of
+    the object, so create one per request or unit of work.
+    """
+
+    def __init__(self, cache: MySQLCache | ShardedMySQLCache, name: str) -> None:
+        self.cache = cache
+        self.name = name
+        self._generation_key = f"django_mysql_namespace:{name}"
+        self._generation: int | None = None
+
+    @property
+    def generation(self) -> int:
+        if self._generation is None:
+            generation = self.cache.get(self._generation_key)
+            if generation is None:
+                # Start from the current time rather than 1, so if the row is
+                # culled, the new generation won't repeat an old one.
+                generation = int(time() * 1000)
+                if not self.cache.add(self._generation_key, generation, None):
+                    generation = self.cache.get(self._generation_key, generation)
+            self._generation = generation
+        return self._generation
+
+    def invalidate(self) -> None:
+        try:
+            self._generation = self.cache.incr(self._generation_key)
+        except ValueError:
+            # No generation stored yet, so no keys to invalidate
+            self._generation = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{self.generation}:{key}"
+
+    def get(
+        self, key: str, default: Any | None = None, version: int | None = None
+    ) -> Any:
+        return self.cache.get(self._key(key), default, version)
+
+    def get_many(
+        self, keys: Iterable[str], version: int | None = None
+    ) -> dict[str, Any]:
+        namespaced_to_key = {self._key(key): key for key in keys}
+        data = self.cache.get_many(namespaced_to_key, version)
+        return {namespaced_to_key[key]: value for key, value in data.items()}
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> None:
+        self.cache.set(self._key(key), value, timeout, version)
+
+    def add(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> bool:
+        return self.cache.add(self._key(key), value, timeout, version)
+
+    def get_or_set(
+        self,
+        key: str,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> Any:
+        return self.cache.get_or_set(self._key(key), default, timeout, version)
+
+    def set_many(
+        self,
+        data: dict[str, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> list[str]:
+        namespaced_to_key = {self._key(key): key for key in data}
+        failed_keys = self.cache.set_many(
+            {self._key(key): value for key, value in data.items()}, timeout, version
+        )
+        return [namespaced_to_key[key] for key in failed_keys]
+
+    def delete(self, key: str, version: int | None = None) -> bool:
+        return self.cache.delete(self._key(key), version)
+
+    def delete_many(self, keys: Iterable[str], version: int | None = None) -> None:
+        self.cache.delete_many([self._key(key) for key in keys], version)
+
+    def has_key(self, key: str, version: int | None = None) -> bool:
+        return self.cache.has_key(self._key(key), version)
+
+    def incr(self, key: str, delta: int = 1, version: int | None = None) -> int:
+        return self.cache.incr(self._key(key), delta, version)
+
+    def decr(self, key: str, delta: int = 1, version: int | None = None) -> int:
+        return self.cache.decr(self._key(key), delta, version)
+
+    def touch(
+        self, key: str, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None
+    ) -> bool:
+        return self.cache.touch(self._key(key), timeout, version)
+
+
+class _ComputedEntry(NamedTuple):
+    """
+    A value stored by MySQLCache.get_or_compute(), with the milliseconds
+    compute() took and the logical expiry time, or None for no expiry.
+    """
+
+    value: Any
+    compute_time: int
+    expiry: int | None
+
+
+class LocalTier:
+    """
+    The rows held in memory for MySQLCache's LOCAL_MAX_ENTRIES option, in
+    least-recently-used order, and the generations last polled from the table.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, tuple[Any, _EncodedKeyType, int]] = OrderedDict()
+        self.generations: list[int] | None = None
+        self.next_sync = 0
+        # Counts the writes that dropped entries, so reads can tell if one
+        # happened while they queried the table
+        self.writes = 0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.writes += 1
+            self.entries.clear()
+
+
+class CacheStats:
+    """
+    Counters and per-operation latency histograms for MySQLCache's STATS
+    option.
+    """
+
+    counter_names = (
+        "hits",
+        "misses",
+        "local_hits",
+        "bytes_read",
+        "bytes_written",
+        "compress_input_bytes",
+        "compress_output_bytes",
+        "encode_time",
+        "decode_time",
+        "culled",
+    )
+
+    # Upper bounds of the latency histogram buckets, in seconds
+    latency_buckets = (
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+        math.inf,
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._counters: dict[str, int | float] = dict.fromkeys(self.counter_names, 0)
+        self._latency_counts: dict[str, list[int]] = {}
+        self._latency_sums: dict[str, float] = {}
+
+    def add(self, **counts: int | float) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                self._counters[name] += count
+
+    def observe(self, operation: str, duration: float) -> None:
+        bucket = bisect_left(self.latency_buckets, duration)
+        with self._lock:
+            try:
+                self._latency_counts[operation][bucket] += 1
+                self._latency_sums[operation] += duration
+            except KeyError:
+                self._latency_counts[operation] = [0] * len(self.latency_buckets)
+                self._latency_counts[operation][bucket] = 1
+                self._latency_sums[operation] = duration
+
+    def snapshot(self, reset: bool = False) -> dict[str, Any]:
+        with self._lock:
+            snapshot = {
+                "counters": dict(self._counters),
+                "latencies": {
+                    operation: {
+                        "count": sum(counts),
+                        "sum": self._latency_sums[operation],
+                        "buckets": dict(zip(self.latency_buckets, counts)),
+                    }
+                    for operation, counts in self._latency_counts.items()
+                },
+            }
+            if reset:
+                self._reset()
+        return snapshot
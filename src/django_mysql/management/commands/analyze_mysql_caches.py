@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.management import BaseCommand, CommandError
+
+from django_mysql.cache import MySQLCache, ShardedMySQLCache
+
+
+class Command(BaseCommand):
+    args = "<optional cache aliases>"
+
+    help = (
+        "Samples the tables of all your MySQLCache caches, or only those "
+        "specified aliases, and reports what they hold."
+    )
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "aliases",
+            metavar="aliases",
+            nargs="*",
+            help="Specify the cache alias(es) to analyze.",
+        )
+        parser.add_argument(
+            "--sample-size",
+            type=int,
+            default=10_000,
+            help="The number of rows to sample from each table.",
+        )
+        parser.add_argument(
+            "--separator",
+            default=":",
+            help="Group keys by their text up to the first instance of this.",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="The number of key groups to show.",
+        )
+
+    def handle(
+        self,
+        *args: Any,
+        aliases: list[str],
+        sample_size: int,
+        separator: str,
+        top: int,
+        **options: Any,
+    ) -> None:
+        if not aliases:
+            aliases = list(settings.CACHES)
+
+        for alias in aliases:
+            try:
+                cache = caches[alias]
+            except InvalidCacheBackendError:
+                raise CommandError(f"Cache {alias!r} does not exist")
+
+            if isinstance(cache, ShardedMySQLCache):
+                shards = cache.shards
+            elif isinstance(cache, MySQLCache):
+                shards = [cache]
+            else:
+                continue  # pragma: no cover
+
+            for shard in shards:
+                self.stdout.write(f"Cache {alias!r}, table {shard._table!r}:")
+                analysis = shard.analyze(sample_size=sample_size, separator=separator)
+                self.write_analysis(analysis, top)
+
+    def write_analysis(self, analysis: dict[str, Any], top: int) -> None:
+        sampled = analysis["sampled_rows"]
+        self.stdout.write(
+            f"  Rows: ~{analysis['estimated_rows']:,} "
+            f"({format_bytes(analysis['data_bytes'])}), sampled {sampled:,}"
+        )
+        if not sampled:
+            self.stdout.write("")
+            return
+        self.stdout.write(f"  Expired: {analysis['expired_fraction']:.1%}")
+
+        self.stdout.write("")
+        self.write_table(
+            ["Keys", "Share", "~Rows", "Mean size", "Expired"],
+            [
+                [
+                    format_group(group),
+                    f"{group['sampled_rows'] / sampled:.1%}",
+                    f"{group['estimated_rows']:,}",
+                    format_bytes(group["mean_size"]),
+                    f"{group['expired_fraction']:.1%}",
+                ]
+                for group in analysis["groups"][:top]
+            ],
+        )
+
+        self.stdout.write("")
+        self.write_table(
+            ["Value type", "Count", "Mean", "Median", "P90", "Max"],
+            [
+                [
+                    value_type,
+                    f"{sizes['count']:,}",
+                    format_bytes(sizes["mean"]),
+                    format_bytes(sizes["median"]),
+                    format_bytes(sizes["p90"]),
+                    format_bytes(sizes["max"]),
+                ]
+                for value_type, sizes in analysis["value_sizes"].items()
+            ],
+        )
+
+        self.stdout.write("")
+        self.write_table(
+            ["Expires", "Share"],
+            [
+                [horizon, f"{count / sampled:.1%}"]
+                for horizon, count in analysis["expiry_horizons"].items()
+            ],
+        )
+        self.stdout.write("")
+
+    def write_table(self, headers: list[str], rows: list[list[str]]) -> None:
+        widths = [
+            max(len(row[i]) for row in [headers, *rows]) for i in range(len(headers))
+        ]
+        for row in [headers, *rows]:
+            # Left-align the first column, right-align the rest
+            cells = [row[0].ljust(widths[0])] + [
+                cell.rjust(width) for cell, width in zip(row[1:], widths[1:])
+            ]
+            self.stdout.write("  " + "  ".join(cells).rstrip())
+
+
+def format_group(group: dict[str, Any]) -> str:
+    if group["key_prefix"] is None:
+        return "(unparseable)"
+    return f"{group['key_prefix']}:{group['version']}:{group['prefix']}"
+
+
+def format_bytes(num: float) -> str:
+    if num < 1024:
+        return f"{num:.0f} B"
+    for unit in ("KB", "MB", "GB", "TB"):
+        num /= 1024
+        if num < 1024 or unit == "TB":
+            break
+    return f"{num:.1f} {unit}"
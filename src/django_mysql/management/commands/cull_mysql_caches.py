@@ -7,7 +7,7 @@ from django.conf import settings
 from django.core.cache import InvalidCacheBackendError, caches
 from django.core.management import BaseCommand, CommandError
 
-from django_mysql.cache import MySQLCache
+from django_mysql.cache import MySQLCache, ShardedMySQLCache
 
 
 class Command(BaseCommand):
@@ -25,10 +25,33 @@ class Command(BaseCommand):
             nargs="*",
             help="Specify the cache alias(es) to cull.",
         )
+        parser.add_argument(
+            "--chunked",
+            action="store_true",
+            help=(
+                "Delete in small chunks, waiting for the database load to be "
+                "low between them."
+            ),
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=None,
+            help="With --chunked, stop culling each cache after this many seconds.",
+        )
 
     def handle(
-        self, *args: Any, verbosity: int, aliases: list[str], **options: Any
+        self,
+        *args: Any,
+        verbosity: int,
+        aliases: list[str],
+        chunked: bool,
+        time_budget: float | None,
+        **options: Any,
     ) -> None:
+        if time_budget is not None and not chunked:
+            raise CommandError("--time-budget requires --chunked.")
+
         if not aliases:
             aliases = list(settings.CACHES)
 
@@ -38,11 +61,14 @@ class Command(BaseCommand):
             except InvalidCacheBackendError:
                 raise CommandError(f"Cache {alias!r} does not exist")
 
-            if not isinstance(cache, MySQLCache):  # pragma: no cover
-                continue
+            if not isinstance(cache, (MySQLCache, ShardedMySQLCache)):
+                continue  # pragma: no cover
 
             if verbosity >= 1:
                 self.stdout.write(f"Deleting from cache {alias!r}... ", ending="")
-            num_deleted = cache.cull()
+            if chunked:
+                num_deleted = cache.cull_chunked(time_budget=time_budget)
+            else:
+                num_deleted = cache.cull()
             if verbosity >= 1:
                 self.stdout.write(f"{num_deleted} entries deleted.")
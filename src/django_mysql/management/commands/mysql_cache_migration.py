@@ -7,7 +7,7 @@ from django.conf import settings
 from django.core.cache import InvalidCacheBackendError, caches
 from django.core.management import BaseCommand, CommandError
 
-from django_mysql.cache import MySQLCache
+from django_mysql.cache import MySQLCache, ShardedMySQLCache
 
 
 class Command(BaseCommand):
@@ -27,17 +27,18 @@ class Command(BaseCommand):
         if not aliases:
             aliases = list(settings.CACHES)
 
-        tables = set()
+        tables: dict[str, str] = {}
         for alias in aliases:
             try:
                 cache = caches[alias]
             except InvalidCacheBackendError:
                 raise CommandError(f"Cache {alias!r} does not exist")
 
-            if not isinstance(cache, MySQLCache):  # pragma: no cover
-                continue
-
-            tables.add(cache._table)
+            if isinstance(cache, ShardedMySQLCache):
+                for shard in cache.shards:
+                    tables.update(shard._create_table_sqls())
+            elif isinstance(cache, MySQLCache):
+                tables.update(cache._create_table_sqls())
 
         if not tables:
             self.stderr.write("No MySQLCache instances in CACHES")
@@ -46,13 +47,18 @@ class Command(BaseCommand):
         migration = self.render_migration(tables)
         self.stdout.write(migration)
 
-    def render_migration(self, tables: set[str]) -> str:
+    def render_migration(self, tables: dict[str, str]) -> str:
         # This used to use a Django template, but we can't instantiate them
         # direct now, as the user may not have the django template engine
         # defined in TEMPLATES
         out = [header]
-        for table in tables:
-            out.append(table_operation.replace("{{ table }}", table))
+        for table, sql in tables.items():
+            create_table_sql = "\n".join("    " * 3 + line for line in sql.splitlines())
+            out.append(
+                table_operation.replace(
+                    "{{ create_table_sql }}", create_table_sql
+                ).replace("{{ table }}", table)
+            )
         out.append(footer)
         return "".join(out)
 
@@ -72,23 +78,14 @@ class Migration(migrations.Migration):
     operations = [
 """.strip()
 
-create_table_sql = "\n".join(
-    "    " * 3 + line for line in MySQLCache.create_table_sql.splitlines()
-).format(table_name="{{ table }}")
-
-
-table_operation = (
-    '''
+table_operation = '''
         migrations.RunSQL(
             """
-'''
-    + create_table_sql
-    + '''
+{{ create_table_sql }}
             """,
             "DROP TABLE `{{ table }}`",
         ),
 '''.rstrip()
-)
 
 
 footer = """
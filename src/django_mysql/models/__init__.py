@@ -20,11 +20,17 @@ from django_mysql.models.fields import (
 )
 from django_mysql.models.query import (
     ApproximateInt,
+    CacheCheckpoint,
+    Checkpoint,
+    FileCheckpoint,
+    KeysetPage,
+    KeysetPaginator,
     QuerySet,
     QuerySetMixin,
     SmartChunkedIterator,
     SmartIterator,
     add_QuerySetMixin,
+    clear_approx_count_cache,
     pt_visual_explain,
 )
 
@@ -34,10 +40,15 @@ __all__ = [
     "BitAnd",
     "BitOr",
     "BitXor",
+    "CacheCheckpoint",
+    "Checkpoint",
     "DynamicField",
     "EnumField",
+    "FileCheckpoint",
     "FixedCharField",
     "GroupConcat",
+    "KeysetPage",
+    "KeysetPaginator",
     "ListCharField",
     "ListF",
     "ListTextField",
@@ -55,5 +66,6 @@ __all__ = [
     "SmartIterator",
     "TinyIntegerField",
     "add_QuerySetMixin",
+    "clear_approx_count_cache",
     "pt_visual_explain",
 ]
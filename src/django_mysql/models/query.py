@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import abc
+import base64
+import binascii
+import datetime
+import json
+import math
 import operator
+import os
 import subprocess
 import sys
+import threading
 import time
 from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import nullcontext
 from copy import copy
 from functools import cache, wraps
+from pathlib import Path
 from typing import Any, Literal, TypedDict, TypeVar, cast
 
 from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import connections, models
-from django.db.models.sql.where import ExtraWhere
+from django.db.models import BooleanField, Expression, F
+from django.db.models.query import ModelIterable
+from django.db.models.sql.compiler import SQLCompiler
+from django.db.models.sql.where import AND, ExtraWhere
 from django.db.transaction import atomic
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
@@ -30,10 +47,14 @@ _Q = TypeVar("_Q", bound="QuerySetMixin")
 QueryRewriteFunc = TypeVar("QueryRewriteFunc", bound=Callable[..., Any])
 
 
+_ApproxFilteredType = Literal["never", "indexed", "always"]
+
+
 class _CountTriesApproxDict(TypedDict):
     fall_back: bool
     return_approx_int: bool
     min_size: int
+    filtered: _ApproxFilteredType
 
 
 _IndexHintForType = Literal["JOIN", "ORDER BY", "GROUP BY", None]
@@ -86,6 +107,7 @@ class QuerySetMixin(models.QuerySet):
         fall_back: bool = True,
         return_approx_int: bool = True,
         min_size: int = 1000,
+        filtered: _ApproxFilteredType = "never",
     ) -> _Q:
         clone = self._clone()
 
@@ -94,6 +116,7 @@ class QuerySetMixin(models.QuerySet):
                 "fall_back": fall_back,
                 "return_approx_int": return_approx_int,
                 "min_size": min_size,
+                "filtered": filtered,
             }
         else:
             clone._count_tries_approx = None
@@ -105,9 +128,10 @@ class QuerySetMixin(models.QuerySet):
         fall_back: bool = True,
         return_approx_int: bool = True,
         min_size: int = 1000,
+        filtered: _ApproxFilteredType = "never",
     ) -> int:
         try:
-            num = approx_count(self)
+            num = approx_count(self, filtered=filtered)
         except ValueError:  # Cannot be approx-counted
             if not fall_back:
                 raise ValueError("Cannot use approx_count on this queryset.")
@@ -275,6 +299,8 @@ class QuerySetMixin(models.QuerySet):
         chunk_max: int = 10000,
         report_progress: bool = False,
         total: int | None = None,
+        workers: int = 1,
+        checkpoint: Checkpoint | None = None,
     ) -> SmartIterator:
         return SmartIterator(
             queryset=self,
@@ -287,6 +313,8 @@ class QuerySetMixin(models.QuerySet):
             chunk_max=chunk_max,
             report_progress=report_progress,
             total=total,
+            workers=workers,
+            checkpoint=checkpoint,
         )
 
     def iter_smart_chunks(
@@ -301,6 +329,8 @@ class QuerySetMixin(models.QuerySet):
         chunk_max: int = 10000,
         report_progress: bool = False,
         total: int | None = None,
+        workers: int = 1,
+        checkpoint: Checkpoint | None = None,
     ) -> SmartChunkedIterator:
         return SmartChunkedIterator(
             queryset=self,
@@ -313,6 +343,8 @@ class QuerySetMixin(models.QuerySet):
             chunk_max=chunk_max,
             report_progress=report_progress,
             total=total,
+            workers=workers,
+            checkpoint=checkpoint,
         )
 
     def iter_smart_pk_ranges(
@@ -327,6 +359,8 @@ class QuerySetMixin(models.QuerySet):
         chunk_max: int = 10000,
         report_progress: bool = False,
         total: int | None = None,
+        workers: int = 1,
+        checkpoint: Checkpoint | None = None,
     ) -> SmartPKRangeIterator:
         return SmartPKRangeIterator(
             queryset=self,
@@ -339,8 +373,15 @@ class QuerySetMixin(models.QuerySet):
             chunk_max=chunk_max,
             report_progress=report_progress,
             total=total,
+            workers=workers,
+            checkpoint=checkpoint,
         )
 
+    def seek_paginate(
+        self, per_page: int, ordering: tuple[str, ...] | None = None
+    ) -> KeysetPaginator:
+        return KeysetPaginator(self, per_page, ordering)
+
     def pt_visual_explain(self, display: bool = True) -> str:
         return pt_visual_explain(self, display)
 
@@ -377,6 +418,8 @@ class ApproximateInt(int):
 
 class SmartChunkedIterator:
     objects_done: int | Literal["???"]
+    # Set on the iterators of run()'s workers, to report progress through
+    _parent: SmartChunkedIterator | None = None
 
     def __init__(
         self,
@@ -391,9 +434,12 @@ class SmartChunkedIterator:
         chunk_max: int = 10000,
         report_progress: bool = False,
         total: int | None = None,
+        workers: int = 1,
+        checkpoint: Checkpoint | None = None,
     ):
         self.queryset = self.sanitize_queryset(queryset)
 
+        self.atomically = atomically
         if atomically:
             self.maybe_atomic = atomic(using=self.queryset.db)
         else:
@@ -415,8 +461,31 @@ class SmartChunkedIterator:
         self.report_progress = report_progress
         self.total = total
 
+        assert workers >= 1, "There should be at least one worker."
+        self.workers = workers
+        self.checkpoint = checkpoint
+
     def __iter__(self) -> Generator[QuerySet]:
+        if self.workers > 1:
+            raise ValueError(
+                f"{self.__class__.__name__} can only use multiple workers with run()."
+            )
         first_pk, last_pk = self.get_first_and_last()
+        current_pk = first_pk
+        if self.checkpoint is not None:
+            state = self.checkpoint.load()
+            if state is not None and "workers" in state:
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint.name!r} was saved with "
+                    f"{state['workers']} worker(s), resume with the same number."
+                )
+            if state is not None:
+                # Resume after the last completed chunk, keeping the original
+                # range so the direction and end are unchanged
+                first_pk, last_pk = state["first_pk"], state["last_pk"]
+                current_pk = state["end_pk"]
+                self.chunk_size = self.constrain_size(state["chunk_size"])
+
         direction: _SmartDirectionType
         if first_pk <= last_pk:
             comp = operator.le  # <=
@@ -424,7 +493,6 @@ class SmartChunkedIterator:
         else:
             comp = operator.ge  # >=
             direction = -1
-        current_pk = first_pk
         status = GlobalStatus(self.queryset.db)
 
         self.init_progress(direction)
@@ -449,12 +517,143 @@ class SmartChunkedIterator:
                 # can be read by SmartRangeIterator or other client code
                 chunk._smart_iterator_pks = (start_pk, end_pk)
                 yield chunk
-                self.update_progress(direction, chunk, end_pk)
+                if self._parent is None:
+                    self.update_progress(direction, chunk, end_pk)
+                else:
+                    self._parent.update_worker_progress(direction, chunk)
 
             self.adjust_chunk_size(chunk, timer.total_time)
+            if self.checkpoint is not None:
+                self.checkpoint.save(
+                    {
+                        "first_pk": first_pk,
+                        "last_pk": last_pk,
+                        "end_pk": end_pk,
+                        "chunk_size": self.chunk_size,
+                    }
+                )
+
+        # Workers' checkpoints are cleared by run() once they have all finished
+        if self.checkpoint is not None and self._parent is None:
+            self.checkpoint.clear()
+        self.end_progress()
+
+    def run(self, func: Callable[[Any], Any]) -> None:
+        """
+        Call func with each item of the iteration. With more than one worker,
+        the pk range is split into that many parts, each iterated in its own
+        thread, with its own connection and chunk size.
+        """
+        if self.workers == 1:
+            for item in self:
+                func(item)
+            return
+
+        if connections[self.queryset.db].in_atomic_block:
+            # The workers' connections wouldn't see the transaction's changes,
+            # nor be rolled back with it
+            raise ValueError(
+                f"{self.__class__.__name__} can't use multiple workers inside "
+                f"a transaction."
+            )
 
+        first_pk, last_pk = self.get_first_and_last()
+        if self.checkpoint is not None:
+            # Resume with the same split, so each worker's checkpoint is for
+            # the same range
+            state = self.checkpoint.load()
+            if state is None:
+                self.checkpoint.save(
+                    {"first_pk": first_pk, "last_pk": last_pk, "workers": self.workers}
+                )
+            elif state.get("workers") != self.workers:
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint.name!r} was saved with "
+                    f"{state.get('workers', 1)} worker(s), resume with the same "
+                    f"number."
+                )
+            else:
+                first_pk, last_pk = state["first_pk"], state["last_pk"]
+
+        direction: _SmartDirectionType = 1 if first_pk <= last_pk else -1
+        self._progress_lock = threading.Lock()
+        self.init_progress(direction)
+
+        children = [
+            self.worker_iterator(pk_range, index)
+            for index, pk_range in enumerate(self.split_range(first_pk, last_pk))
+        ]
+        stop = threading.Event()
+
+        def work(child: SmartChunkedIterator) -> None:
+            items = iter(child)
+            try:
+                for item in items:
+                    if stop.is_set():
+                        break
+                    func(item)
+            except BaseException:
+                stop.set()
+                raise
+            finally:
+                # Roll back any chunk left open
+                items.close()
+                # Including any connections func or the checkpoint opened
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(work, child) for child in children]
+        for future in futures:
+            future.result()
+
+        if self.checkpoint is not None:
+            for child in children:
+                assert child.checkpoint is not None
+                child.checkpoint.clear()
+            self.checkpoint.clear()
         self.end_progress()
 
+    def split_range(self, first_pk: int, last_pk: int) -> list[tuple[int, int]]:
+        # Split the inclusive range from first_pk to last_pk into up to
+        # self.workers disjoint ranges of near-equal size, in the same order
+        direction = 1 if first_pk <= last_pk else -1
+        size = abs(last_pk - first_pk) + 1
+        parts = min(self.workers, size)
+        return [
+            (
+                first_pk + direction * (size * i // parts),
+                first_pk + direction * (size * (i + 1) // parts - 1),
+            )
+            for i in range(parts)
+        ]
+
+    def worker_iterator(
+        self, pk_range: tuple[int, int], index: int
+    ) -> SmartChunkedIterator:
+        child = self.__class__(
+            # Ordering is added back by sanitize_queryset()
+            self.queryset.order_by(),
+            atomically=self.atomically,
+            status_thresholds=self.status_thresholds,
+            pk_range=pk_range,
+            chunk_time=self.rate.target_t,
+            chunk_size=self.chunk_size,
+            chunk_min=self.chunk_min,
+            chunk_max=self.chunk_max,
+            checkpoint=(
+                None if self.checkpoint is None else self.checkpoint.worker(index)
+            ),
+        )
+        child._parent = self
+        return child
+
+    def update_worker_progress(
+        self, direction: _SmartDirectionType, chunk: models.QuerySet
+    ) -> None:
+        # Workers' positions are interleaved, so report without a pk or ETA
+        with self._progress_lock:
+            self.update_progress(direction, chunk)
+
     def sanitize_queryset(self, queryset: models.QuerySet) -> models.QuerySet:
         if queryset.ordered:
             raise ValueError(
@@ -660,15 +859,347 @@ class SmartPKRangeIterator(SmartChunkedIterator):
             yield start_pk, end_pk
 
 
-def approx_count(queryset: models.QuerySet) -> int:
+class Checkpoint(abc.ABC):
+    """
+    Base class for stores of a SmartChunkedIterator's progress, so it can be
+    resumed. Subclasses store state, a JSON-compatible dict, under the job
+    name.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @abc.abstractmethod
+    def load(self) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save(self, state: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def worker(self, index: int) -> Checkpoint:
+        # The checkpoint for one of run()'s workers
+        checkpoint = copy(self)
+        checkpoint.name = f"{self.name}.worker{index}"
+        return checkpoint
+
+
+class CacheCheckpoint(Checkpoint):
+    def __init__(self, name: str, using: str = "default") -> None:
+        super().__init__(name)
+        self.using = using
+
+    @property
+    def key(self) -> str:
+        return f"django_mysql:checkpoint:{self.name}"
+
+    def load(self) -> dict[str, Any] | None:
+        state: dict[str, Any] | None = caches[self.using].get(self.key)
+        return state
+
+    def save(self, state: dict[str, Any]) -> None:
+        caches[self.using].set(self.key, state, timeout=None)
+
+    def clear(self) -> None:
+        caches[self.using].delete(self.key)
+
+
+class FileCheckpoint(Checkpoint):
+    def __init__(self, name: str, directory: str | os.PathLike[str] = ".") -> None:
+        super().__init__(name)
+        self.directory = Path(directory)
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.name}.json"
+
+    def load(self) -> dict[str, Any] | None:
+        try:
+            state: dict[str, Any] = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        return state
+
+    def save(self, state: dict[str, Any]) -> None:
+        # Write then rename, so a crash part way leaves the previous state
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        temp_path.write_text(json.dumps(state))
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class _CursorJSONEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder truncates to milliseconds, but DATETIME(6) and TIME(6)
+    # columns can hold several rows per millisecond that the cursor must
+    # tell apart
+    def default(self, o: Any) -> Any:
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPaginator:
+    """
+    Paginates by seeking past the ordering values of the previous page's last
+    row, rather than with OFFSET, so deep pages are as fast as the first.
+    """
+
+    def __init__(
+        self,
+        queryset: models.QuerySet,
+        per_page: int,
+        ordering: tuple[str, ...] | None = None,
+    ) -> None:
+        if queryset._iterable_class is not ModelIterable:
+            raise ValueError("KeysetPaginator can only paginate model instances.")
+        if per_page < 1:
+            raise ValueError("per_page must be at least 1.")
+
+        order_by: tuple[Any, ...] = ordering or (
+            tuple(queryset.query.order_by) or tuple(queryset.model._meta.ordering)
+        )
+        if not all(isinstance(name, str) and name != "?" for name in order_by):
+            raise ValueError("KeysetPaginator ordering must be field names.")
+        ordering = order_by
+        names = [name.lstrip("-") for name in ordering]
+        # Make the ordering unique
+        pk_name = queryset.model._meta.pk.name
+        if "pk" not in names and pk_name not in names:
+            ordering = (*ordering, "pk")
+
+        self.per_page = per_page
+        self.ordering = ordering
+        self.descending = [name.startswith("-") for name in ordering]
+        self.queryset = queryset.order_by(*ordering).annotate(
+            **{f"_seek_{i}": F(name.lstrip("-")) for i, name in enumerate(ordering)}
+        )
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.queryset
+        if not isinstance(queryset, QuerySetMixin):
+            queryset = add_QuerySetMixin(queryset)
+        return queryset.approx_count(filtered="indexed")
+
+    @property
+    def num_pages(self) -> int:
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        if cursor is None:
+            backwards = False
+            queryset = self.queryset
+        else:
+            backwards, values = self.decode_cursor(cursor)
+            queryset = self.seek(values, backwards)
+
+        rows = list(queryset[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=more)
+        return KeysetPage(rows, self, has_next=more, has_previous=cursor is not None)
+
+    def seek(self, values: list[Any], backwards: bool = False) -> models.QuerySet:
+        """
+        Return the queryset filtered to rows after the given ordering values,
+        or before them in reverse order if backwards.
+        """
+        queryset = self.queryset
+        if backwards:
+            queryset = queryset.reverse()
+        queryset = queryset._chain()
+        query = queryset.query
+        connection = connections[queryset.db]
+
+        columns = []
+        params = []
+        for name, value in zip(self.ordering, values):
+            column = query.resolve_ref(name.lstrip("-"))
+            field = column.output_field
+            columns.append(column)
+            try:
+                params.append(
+                    field.get_db_prep_value(field.to_python(value), connection)
+                )
+            except (ValidationError, ValueError, TypeError):
+                # The values come from a cursor the client could have altered
+                raise InvalidPage(_("That cursor is not valid"))
+        descending = [is_descending != backwards for is_descending in self.descending]
+        # Added to the where clause directly, since filter() would compare
+        # the condition to TRUE, stopping MySQL from using an index for it
+        query.where.add(_RowValueComparison(columns, params, descending), AND)
+        return queryset
+
+    def encode_cursor(self, obj: models.Model, backwards: bool = False) -> str:
+        values = [getattr(obj, f"_seek_{i}") for i in range(len(self.ordering))]
+        data = json.dumps([backwards, values], cls=_CursorJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> tuple[bool, list[Any]]:
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            backwards, values = json.loads(data)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidPage(_("That cursor is not valid"))
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidPage(_("That cursor is not valid"))
+        return bool(backwards), values
+
+
+class KeysetPage:
+    def __init__(
+        self,
+        object_list: list[models.Model],
+        paginator: KeysetPaginator,
+        *,
+        has_next: bool,
+        has_previous: bool,
+    ) -> None:
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self) -> str:
+        return f"<KeysetPage of {len(self.object_list)} objects>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __iter__(self) -> Generator[models.Model]:
+        yield from self.object_list
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self) -> str | None:
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @cached_property
+    def previous_cursor(self) -> str | None:
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], backwards=True)
+
+
+class _RowValueComparison(Expression):
+    """
+    Compares the row value of columns with params, e.g. (a, b) > (%s, %s).
+    Mixed directions can't use a row value, so become the equivalent OR chain,
+    e.g. a > %s OR (a = %s AND b < %s).
+    """
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(
+        self, columns: list[Expression], params: list[Any], descending: list[bool]
+    ) -> None:
+        super().__init__()
+        self.columns = columns
+        self.params = params
+        self.descending = descending
+
+    def get_source_expressions(self) -> list[Expression]:
+        return self.columns
+
+    def set_source_expressions(self, exprs: list[Expression]) -> None:
+        self.columns = exprs
+
+    def as_sql(self, compiler: SQLCompiler, connection: Any) -> tuple[str, list[Any]]:
+        sqls = []
+        column_params = []
+        for column in self.columns:
+            sql, params = compiler.compile(column)
+            sqls.append(sql)
+            column_params.append(list(params))
+
+        if len(set(self.descending)) == 1:
+            operator = "<" if self.descending[0] else ">"
+            placeholders = ", ".join(["%s"] * len(sqls))
+            return (
+                f"({', '.join(sqls)}) {operator} ({placeholders})",
+                [*(p for params in column_params for p in params), *self.params],
+            )
+
+        conditions = []
+        all_params: list[Any] = []
+        for i, descending in enumerate(self.descending):
+            parts = []
+            for j in range(i):
+                parts.append(f"{sqls[j]} = %s")
+                all_params.extend([*column_params[j], self.params[j]])
+            parts.append(f"{sqls[i]} {'<' if descending else '>'} %s")
+            all_params.extend([*column_params[i], self.params[i]])
+            conditions.append("(" + " AND ".join(parts) + ")")
+        return "(" + " OR ".join(conditions) + ")", all_params
+
+
+def approx_count(
+    queryset: models.QuerySet, filtered: _ApproxFilteredType = "never"
+) -> int:
     # Returns the approximate count or raises a ValueError if this queryset
     # cannot be approximately counted
     if not can_approx_count(queryset):
+        if filtered != "never" and can_explain_count(queryset):
+            return explain_count(queryset, filtered)
         raise ValueError("This QuerySet cannot be approximately counted")
 
-    connection = connections[queryset.db]
-    with connection.cursor() as cursor:
-        table_name = queryset.model._meta.db_table
+    return table_rows(queryset.db, queryset.model._meta.db_table)
+
+
+# Maps (database alias, table name) to (expiry time, row estimate)
+_table_rows_cache: dict[tuple[str, str], tuple[float, int]] = {}
+
+
+def table_rows(using: str, table_name: str) -> int:
+    # Returns the table's row estimate from INFORMATION_SCHEMA, cached in the
+    # process for DJANGO_MYSQL_APPROX_COUNT_TTL seconds, and if
+    # DJANGO_MYSQL_APPROX_COUNT_CACHE names a cache, shared through it
+    ttl = getattr(settings, "DJANGO_MYSQL_APPROX_COUNT_TTL", 0)
+    if not ttl:
+        return _fetch_table_rows(using, table_name)
+
+    now = time.time()
+    cached = _table_rows_cache.get((using, table_name))
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    cache_alias = getattr(settings, "DJANGO_MYSQL_APPROX_COUNT_CACHE", None)
+    if cache_alias is None:
+        cached = (now + ttl, _fetch_table_rows(using, table_name))
+    else:
+        # Store the expiry time too, so processes reading the shared entry
+        # don't keep it for longer than the TTL
+        shared_cache = caches[cache_alias]
+        cache_key = f"django_mysql:approx_count:{using}:{table_name}"
+        cached = shared_cache.get(cache_key)
+        if cached is None:
+            cached = (now + ttl, _fetch_table_rows(using, table_name))
+            shared_cache.set(cache_key, cached, ttl)
+    _table_rows_cache[(using, table_name)] = cached
+    return cached[1]
+
+
+def _fetch_table_rows(using: str, table_name: str) -> int:
+    with connections[using].cursor() as cursor:
         cursor.execute(
             """SELECT TABLE_ROWS
                FROM INFORMATION_SCHEMA.TABLES
@@ -677,22 +1208,18 @@ def approx_count(queryset: models.QuerySet) -> int:
             """,
             (table_name,),
         )
-        # N.B. when we support more complex QuerySets they should be estimated
-        # with 'EXPLAIN SELECT'
-        approx_count = cursor.fetchone()[0]
+        approx_count: int = cursor.fetchone()[0]
         return approx_count
 
 
+def clear_approx_count_cache() -> None:
+    _table_rows_cache.clear()
+
+
 def can_approx_count(queryset: QuerySetMixin) -> bool:
     query = queryset.query
 
-    if (
-        query.select
-        or query.group_by
-        or query.distinct
-        or query.high_mark is not None
-        or query.low_mark != 0
-    ):
+    if not can_explain_count(queryset):
         return False
 
     # Visit parts of the where clause - if any is not a query hint, fail
@@ -705,6 +1232,73 @@ def can_approx_count(queryset: QuerySetMixin) -> bool:
     return True
 
 
+def can_explain_count(queryset: models.QuerySet) -> bool:
+    # Whether the queryset selects whole rows, so its EXPLAIN row estimates
+    # are an estimate of its count
+    query = queryset.query
+    return not (
+        query.select
+        or query.group_by
+        or query.distinct
+        or query.combinator
+        or query.high_mark is not None
+        or query.low_mark != 0
+    )
+
+
+def explain_count(
+    queryset: models.QuerySet, filtered: _ApproxFilteredType = "indexed"
+) -> int:
+    # Returns the count estimated by 'EXPLAIN FORMAT=JSON', from each table's
+    # rows multiplied by its filtered percentage, or raises a ValueError if
+    # the plan is unrecognized. With filtered="indexed", the estimate is only
+    # trusted if every table is read with an index that covers all its
+    # conditions - MySQL guesses the filtered percentage for other conditions.
+    query = queryset.query.clone()
+    query.clear_ordering(force=True)
+    try:
+        sql, params = query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return 0
+
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+        plan = json.loads(cursor.fetchone()[0])
+
+    query_block = plan["query_block"]
+    # MySQL puts the message on the query block, MariaDB on its table
+    message = query_block.get("message") or query_block.get("table", {}).get(
+        "message", ""
+    )
+    if "Impossible" in message or "no matching row" in message:
+        return 0
+
+    if "nested_loop" in query_block:
+        tables = [step.get("table", {}) for step in query_block["nested_loop"]]
+    elif "table" in query_block:
+        tables = [query_block["table"]]
+    else:
+        raise ValueError("This QuerySet cannot be approximately counted")
+
+    estimate = 1.0
+    for table in tables:
+        # MySQL and MariaDB name the rows estimate differently
+        rows = table.get("rows_examined_per_scan", table.get("rows"))
+        percent = float(table.get("filtered", 100))
+        if rows is None:
+            raise ValueError("This QuerySet cannot be approximately counted")
+        if filtered == "indexed" and (
+            "key" not in table
+            or percent < 100
+            or "attached_subqueries" in table
+            or "materialized_from_subquery" in table
+        ):
+            raise ValueError("This QuerySet cannot be confidently estimated")
+        estimate *= rows * percent / 100
+    return round(estimate)
+
+
 def pt_visual_explain(queryset: models.QuerySet, display: bool = True) -> str:
     # Lazy import improves start time - manage.py wouldn't normally import django.test
     from django.test.utils import CaptureQueriesContext
@@ -1,25 +1,46 @@
 from __future__ import annotations
 
+import math
 import os
 import pickle
+import threading
 import time
 import types
+import zlib
+from collections import namedtuple
 from decimal import Decimal
 from io import StringIO
 from typing import Any
+from unittest import mock
+from unittest.mock import ANY
 
 import pytest
+from asgiref.sync import sync_to_async
 from django.core.cache import CacheKeyWarning, cache, caches
 from django.core.management import CommandError, call_command
-from django.db import IntegrityError, connection
+from django.db import IntegrityError, connection, connections
 from django.db.migrations.state import ProjectState
+from django.db.transaction import atomic
 from django.http import HttpResponse
 from django.middleware.cache import FetchFromCacheMiddleware, UpdateCacheMiddleware
 from django.test import RequestFactory, TestCase, TransactionTestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.safestring import SafeString
 from unittest_parametrize import ParametrizedTestCase, parametrize
 
-from django_mysql.cache import BIGINT_SIGNED_MAX, BIGINT_SIGNED_MIN, MySQLCache
+from django_mysql.cache import (
+    BIGINT_SIGNED_MAX,
+    BIGINT_SIGNED_MIN,
+    LocalTier,
+    MySQLCache,
+    ShardedMySQLCache,
+    _ComputedEntry,
+    _cull_threads,
+    _local_tiers,
+    _shard_executors,
+    cache_operation,
+)
+from django_mysql.locks import Lock
 from tests.testapp.models import Poll, expensive_calculation
 
 
@@ -42,6 +63,9 @@ def empty_response(request):  # pragma: no cover
     return HttpResponse()
 
 
+Point = namedtuple("Point", ["x", "y"])
+
+
 class MyInt(int):
     def times2(self):
         return self * 2
@@ -105,6 +129,13 @@ def caches_setting_for_tests(options=None, **params):
     return setting
 
 
+class ReplicaCacheRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == "django_mysql":
+            return "other"
+        return None
+
+
 # Spaces are used in the table name to ensure quoting/escaping is working
 def override_cache_settings(
     BACKEND="django_mysql.cache.MySQLCache", LOCATION="test cache table", **kwargs
@@ -143,6 +174,11 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
         super().tearDownClass()
         cls.drop_table()
 
+    def setUp(self):
+        super().setUp()
+        # Local tiers outlive the rolled back rows of previous tests
+        _local_tiers.clear()
+
     def table_count(self):
         with connection.cursor() as cursor:
             cursor.execute(f"SELECT COUNT(*) FROM `{self.table_name}`")
@@ -229,6 +265,223 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
         with pytest.raises(ValueError):
             cache.decr("does_not_exist")
 
+    def test_incr_initial(self):
+        with self.assertNumQueries(1):
+            assert cache.incr("counter", initial=10) == 11
+        assert cache.incr("counter", 5, initial=10) == 16
+        assert cache.decr("counter", initial=10) == 15
+        assert cache.decr("other", 3, initial=10) == 7
+        assert cache.get_many(["counter", "other"]) == {"counter": 15, "other": 7}
+
+    def test_incr_initial_keeps_expiry(self):
+        cache.set("counter", 1, 0.5)
+        assert cache.incr("counter", initial=0, timeout=1000) == 2
+        time.sleep(0.6)
+        assert cache.get("counter") is None
+
+    def test_incr_initial_overwrites_expired_and_non_integers(self):
+        cache.set("expired", 100, 0.1)
+        cache.set("string", "value")
+        time.sleep(0.2)
+
+        assert cache.incr("expired", initial=0, timeout=1000) == 1
+        assert cache.incr("string", initial=0) == 1
+        assert cache.get_many(["expired", "string"]) == {"expired": 1, "string": 1}
+
+    def test_incr_many(self):
+        cache.set_many({"a": 1, "b": 10})
+        assert cache.incr_many({"a": 1, "b": 5}) == {"a": 2, "b": 15}
+        assert cache.decr_many({"a": 2, "b": 5}) == {"a": 0, "b": 10}
+        assert cache.incr_many({}) == {}
+
+    def test_incr_many_missing(self):
+        cache.set_many({"a": 1, "b": "string"})
+        with pytest.raises(ValueError) as excinfo:
+            cache.incr_many({"a": 1, "b": 1, "c": 1})
+        assert str(excinfo.value) == "Keys ['b', 'c'] not found, or not integers"
+        # Nothing changed
+        assert cache.get("a") == 1
+
+    def test_incr_many_initial(self):
+        cache.set_many({"a": 1, "b": "string"})
+        cache.set("expired", 100, 0.1)
+        time.sleep(0.2)
+
+        assert cache.incr_many({"a": 1, "b": 2, "c": 3, "expired": 4}, initial=10) == {
+            "a": 2,
+            "b": 12,
+            "c": 13,
+            "expired": 14,
+        }
+        assert cache.decr_many({"a": 1, "d": 1}, initial=10) == {"a": 1, "d": 9}
+
+    def test_get_or_set_skips_refetch(self):
+        the_cache = caches["no_cull"]
+        with self.assertNumQueries(2):
+            assert the_cache.get_or_set("key", "value") == "value"
+        with self.assertNumQueries(1):
+            assert the_cache.get_or_set("key", "other") == "value"
+        assert the_cache.get_or_set("callable", lambda: "computed") == "computed"
+        assert the_cache.get("callable") == "computed"
+
+    def test_get_or_compute(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        assert cache.get_or_compute("key", compute) == "value"
+        assert cache.get_or_compute("key", compute) == "value"
+        assert len(calls) == 1
+
+        entry = cache.get("key")
+        assert isinstance(entry, _ComputedEntry)
+        assert entry.value == "value"
+        assert entry.compute_time >= 0
+        assert entry.expiry > cache._now()
+
+    def test_get_or_compute_forever(self):
+        assert cache.get_or_compute("key", lambda: "value", None) == "value"
+        assert cache.get("key").expiry is None
+        assert cache.get_or_compute("key", lambda: "other", None) == "value"
+
+    def test_get_or_compute_refreshes_early(self):
+        # Took 1s to compute and expires in 10ms, so almost surely refresh
+        cache.set("key", _ComputedEntry("old", 1000, cache._now() + 10))
+        assert cache.get_or_compute("key", lambda: "new", beta=100) == "new"
+
+        # Took 1ms to compute and expires in 1000s, so almost surely not
+        cache.set("key", _ComputedEntry("old", 1, cache._now() + 1_000_000))
+        assert cache.get_or_compute("key", lambda: "new") == "old"
+
+    @parametrize("value", [("plain",), (("old", 1, None),), (None,)])
+    def test_get_or_compute_other_values_miss(self, value):
+        cache.set("key", value)
+        assert cache.get_or_compute("key", lambda: "new") == "new"
+        assert cache.get_or_compute("key", lambda: "other") == "new"
+
+    def test_get_or_compute_keeps_stale_rows(self):
+        cache.get_or_compute("key", lambda: "value", 0.1, stale_timeout=60)
+        time.sleep(0.2)
+
+        entry = cache.get("key")
+        assert entry.value == "value"
+        assert entry.expiry < cache._now()
+        assert cache.get_or_compute("key", lambda: "new") == "new"
+
+    def test_get_or_compute_lock(self):
+        assert cache.get_or_compute("key", lambda: "value", lock=True) == "value"
+        assert cache.get_or_compute("key", lambda: "other", lock=True) == "value"
+        assert not Lock(cache._compute_lock_name("default", "key", None)).is_held()
+
+    def test_get_or_compute_lock_name_length(self):
+        lock = Lock(cache._compute_lock_name("default", "k" * 250, None))
+        assert len(lock.name) <= 64
+
+        long_name = "a_rather_long_database_name_for_tests"
+        with mock.patch.dict(connection.settings_dict, {"NAME": long_name}):
+            lock = Lock(cache._compute_lock_name("default", "key", None))
+        assert lock.name.startswith(f"{long_name}.dm.compute.")
+        assert len(lock.name) == 64
+
+    def test_get_or_compute_lock_held_serves_stale(self):
+        cache.set("key", _ComputedEntry("old", 1000, cache._now() - 10))
+
+        lock_name = Lock.make_name(
+            "default", cache._compute_lock_name("default", "key", None)
+        )
+        other_connection = connections.create_connection("default")
+        try:
+            with other_connection.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0)", (lock_name,))
+            assert cache.get_or_compute("key", lambda: "new", lock=True) == "old"
+
+            # Without a stale value, compute once the wait times out
+            cache.delete("key")
+            assert (
+                cache.get_or_compute("key", lambda: "new", lock=True, lock_wait=0)
+                == "new"
+            )
+            assert cache.get("key").value == "new"
+        finally:
+            other_connection.close()
+
+    def test_get_stats_disabled(self):
+        with pytest.raises(ValueError) as excinfo:
+            cache.get_stats()
+        assert str(excinfo.value) == "Set the STATS option to collect stats."
+
+    @override_cache_settings(options={"STATS": True})
+    def test_get_stats(self):
+        cache.get_stats(reset=True)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        assert cache.get("missing") is None
+        assert cache.get_many(["key", "missing"]) == {"key": "value"}
+
+        stats = cache.get_stats()
+        counters = stats["counters"]
+        assert counters["hits"] == 2
+        assert counters["misses"] == 2
+        assert counters["local_hits"] == 0
+        assert counters["bytes_read"] > 0
+        assert counters["bytes_written"] > 0
+        assert counters["encode_time"] > 0
+        assert counters["decode_time"] > 0
+        assert stats["latencies"]["get"]["count"] == 2
+        assert sum(stats["latencies"]["get"]["buckets"].values()) == 2
+        assert stats["latencies"]["get"]["sum"] > 0
+        assert stats["latencies"]["get_many"]["count"] == 1
+        assert stats["latencies"]["set"]["count"] == 1
+
+    @override_cache_settings(options={"STATS": True})
+    def test_get_stats_reset(self):
+        cache.get("missing")
+        assert cache.get_stats(reset=True)["counters"]["misses"] > 0
+        stats = cache.get_stats()
+        assert stats["counters"]["misses"] == 0
+        assert stats["latencies"] == {}
+
+    @override_cache_settings(options={"STATS": True})
+    def test_get_stats_compression(self):
+        cache.get_stats(reset=True)
+        cache.set("key", "a" * 10000)
+
+        counters = cache.get_stats()["counters"]
+        assert counters["compress_input_bytes"] > 10000
+        assert 0 < counters["compress_output_bytes"] < 1000
+
+    @override_cache_settings(options={"STATS": True})
+    def test_get_stats_cull(self):
+        cache.get_stats(reset=True)
+        cache.set("key", "value", 0.1)
+        time.sleep(0.2)
+        cache.cull()
+
+        stats = cache.get_stats()
+        assert stats["counters"]["culled"] == 1
+        assert stats["latencies"]["cull"]["count"] == 1
+
+    @override_cache_settings(options={"STATS": True})
+    def test_cache_operation_signal(self):
+        calls = []
+
+        def receiver(sender, cache, operation, duration, **kwargs):
+            calls.append((sender, cache, operation, duration))
+
+        cache_operation.connect(receiver)
+        try:
+            cache.set("key", "value")
+            cache.get("key")
+        finally:
+            cache_operation.disconnect(receiver)
+
+        assert [call[2] for call in calls if call[2] != "cull"] == ["set", "get"]
+        assert all(call[0] is MySQLCache for call in calls)
+        assert all(call[1] is caches["default"] for call in calls)
+        assert all(call[3] > 0 for call in calls)
+
     def test_close(self):
         assert hasattr(cache, "close")
         cache.close()
@@ -812,6 +1065,30 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
 
         assert value == {"a": "a", "b": "b"}
 
+    def test_get_many_pads_key_lists(self):
+        our_cache = caches["default"]
+        our_cache.set_many({"a": "a", "b": "b", "c": "c"})
+        assert our_cache.get_many(["a", "b", "c"]) == {"a": "a", "b": "b", "c": "c"}
+        num_statements = len(our_cache._sql_memo)
+
+        # Lists of three and four keys share one statement
+        assert our_cache.get_many(["a", "b", "c", "d"]) == {
+            "a": "a",
+            "b": "b",
+            "c": "c",
+        }
+        assert len(our_cache._sql_memo) == num_statements
+
+    def test_sql_memo_max_entries(self):
+        our_cache = caches["no_cull"]
+        with mock.patch.object(our_cache, "sql_memo_max_entries", 4):
+            for size in range(1, 10):
+                our_cache.set_many({f"key{i}": i for i in range(size)})
+            assert len(our_cache._sql_memo) == 4
+
+        our_cache.delete_many(["a", "b", "c"])
+        assert our_cache.get_many(["a", "b", "c"]) == {}
+
     def test_get_many_with_one_expired(self):
         # Multiple cache keys can be returned using get_many
         the_cache = caches["no_cull"]
@@ -959,6 +1236,171 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
         cache.set("key", a11)
         assert cache.get("key") == a11
 
+    def stored_value_type(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT value_type FROM `{self.table_name}`")
+            return cursor.fetchone()[0]
+
+    @parametrize(
+        "compressor,value_type,module",
+        [("zlib", "z", "zlib"), ("zstd", "s", "zstandard"), ("lz4", "l", "lz4")],
+    )
+    def test_compressor(self, compressor, value_type, module):
+        pytest.importorskip(module)
+        with override_cache_settings(
+            options={"COMPRESSOR": compressor, "COMPRESS_MIN_LENGTH": 10}
+        ):
+            cache.set("key", "a" * 11)
+            assert self.stored_value_type() == value_type
+            assert cache.get("key") == "a" * 11
+
+    def test_changing_compressor_leaves_compressed_data_readable(self):
+        pytest.importorskip("zstandard")
+        pytest.importorskip("lz4")
+        a11 = "a" * 11
+        with override_cache_settings(
+            options={"COMPRESSOR": "zstd", "COMPRESS_MIN_LENGTH": 10}
+        ):
+            cache.set("key", a11)
+
+        with override_cache_settings(
+            options={"COMPRESSOR": "lz4", "COMPRESS_MIN_LENGTH": 10}
+        ):
+            assert cache.get("key") == a11
+
+    def test_unknown_compressor(self):
+        with pytest.raises(ValueError) as excinfo:
+            MySQLCache(self.table_name, {"OPTIONS": {"COMPRESSOR": "bz2"}})
+        assert str(excinfo.value).startswith("Unknown COMPRESSOR 'bz2'")
+
+    def test_zstd_dictionary(self):
+        pytest.importorskip("zstandard")
+        cache.set_many({f"key{i}": {"id": i, "name": f"name{i}"} for i in range(500)})
+        dictionary = cache.train_zstd_dictionary(dict_size=1024)
+        cache.clear()
+
+        with override_cache_settings(
+            options={
+                "COMPRESSOR": "zstd",
+                "COMPRESS_MIN_LENGTH": 1,
+                "ZSTD_DICTIONARY": dictionary,
+            }
+        ):
+            cache.set("key", {"id": 1, "name": "name1"})
+            assert self.stored_value_type() == "d"
+            assert cache.get("key") == {"id": 1, "name": "name1"}
+
+    @parametrize(
+        "compressor,module",
+        [("zlib", "zlib"), ("zstd", "zstandard"), ("lz4", "lz4")],
+    )
+    def test_compressor_large_value_streamed(self, compressor, module):
+        pytest.importorskip(module)
+        value = os.urandom(600_000)
+        with override_cache_settings(
+            options={"COMPRESSOR": compressor, "COMPRESS_MIN_LENGTH": 10}
+        ):
+            cache.set("key", value)
+            assert cache.get("key") == value
+
+    def test_decode_memoryview(self):
+        our_cache = caches["default"]
+        value, value_type = our_cache.encode("a" * 100)
+        assert our_cache.decode(memoryview(value), value_type) == "a" * 100
+
+    def test_decode_stream_truncated(self):
+        our_cache = caches["default"]
+        value = zlib.compress(pickle.dumps(os.urandom(600_000)))
+        with pytest.raises(zlib.error, match="Compressed data ended early."):
+            our_cache.decode(value[:300_000], "z")
+
+    @override_cache_settings(options={"OUT_OF_BAND_MIN_LENGTH": 1024})
+    def test_out_of_band(self):
+        cache.set("key", {"data": pickle.PickleBuffer(b"x" * 5000), "name": "a"})
+        assert self.stored_value_type() == "b"
+        result = cache.get("key")
+        assert bytes(result["data"]) == b"x" * 5000
+        assert result["name"] == "a"
+
+    @override_cache_settings(options={"OUT_OF_BAND_MIN_LENGTH": 1024})
+    def test_out_of_band_small_buffers_in_band(self):
+        cache.set("key", pickle.PickleBuffer(b"x" * 100))
+        assert self.stored_value_type() == "p"
+        assert bytes(cache.get("key")) == b"x" * 100
+
+    @parametrize(
+        "serializer,value_type,module",
+        [("msgpack", "m", "msgpack"), ("json", "j", "orjson")],
+    )
+    def test_serializer(self, serializer, value_type, module):
+        pytest.importorskip(module)
+        with override_cache_settings(options={"SERIALIZER": serializer}):
+            cache.set("key", {"a": [1, "b", None]})
+            assert self.stored_value_type() == value_type
+            assert cache.get("key") == {"a": [1, "b", None]}
+
+    @parametrize(
+        "serializer,module",
+        [("msgpack", "msgpack"), ("json", "orjson")],
+    )
+    def test_serializer_falls_back_to_pickle(self, serializer, module):
+        pytest.importorskip(module)
+        with override_cache_settings(options={"SERIALIZER": serializer}):
+            cache.set("key", Decimal("1.1"))
+            assert self.stored_value_type() == "p"
+            assert cache.get("key") == Decimal("1.1")
+
+    @parametrize(
+        "serializer,module,value",
+        [
+            ("msgpack", "msgpack", (1, 2)),
+            ("msgpack", "msgpack", Point(1, 2)),
+            ("msgpack", "msgpack", {"a": [SafeString("b")]}),
+            ("msgpack", "msgpack", bytearray(b"x")),
+            ("json", "orjson", (1, 2)),
+            ("json", "orjson", Point(1, 2)),
+            ("json", "orjson", {"a": [SafeString("b")]}),
+            ("json", "orjson", {1: "a"}),
+            ("json", "orjson", [math.inf]),
+        ],
+    )
+    def test_serializer_pickles_other_types(self, serializer, module, value):
+        pytest.importorskip(module)
+        with override_cache_settings(options={"SERIALIZER": serializer}):
+            cache.set("key", value)
+            assert self.stored_value_type() == "p"
+            result = cache.get("key")
+            assert result == value
+            assert type(result) is type(value)
+
+    @parametrize(
+        "serializer,module",
+        [("msgpack", "msgpack"), ("json", "orjson")],
+    )
+    def test_serializer_keeps_nested_types(self, serializer, module):
+        pytest.importorskip(module)
+        with override_cache_settings(options={"SERIALIZER": serializer}):
+            cache.set("key", {"a": [(1, 2), SafeString("b")]})
+            assert self.stored_value_type() == "p"
+            result = cache.get("key")
+            assert type(result["a"][0]) is tuple
+            assert type(result["a"][1]) is SafeString
+
+    @parametrize(
+        "serializer,module",
+        [("msgpack", "msgpack"), ("json", "orjson")],
+    )
+    def test_serializer_nan(self, serializer, module):
+        pytest.importorskip(module)
+        with override_cache_settings(options={"SERIALIZER": serializer}):
+            cache.set("key", [math.nan])
+            assert math.isnan(cache.get("key")[0])
+
+    def test_unknown_serializer(self):
+        with pytest.raises(ValueError) as excinfo:
+            MySQLCache(self.table_name, {"OPTIONS": {"SERIALIZER": "yaml"}})
+        assert str(excinfo.value).startswith("Unknown SERIALIZER 'yaml'")
+
     def test_our_options_quacks_like_djangos(self):
         from django.core.cache.backends.db import Options
 
@@ -1001,6 +1443,182 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
                 count = count + 1
         assert count == final_count
 
+    def no_expires_index_cache(self):
+        cull_cache = MySQLCache(
+            self.table_name,
+            {
+                "OPTIONS": {
+                    "CULL_FREQUENCY": 2,
+                    "CULL_PROBABILITY": 0,
+                    "MAX_ENTRIES": 30,
+                }
+            },
+        )
+        cull_cache._expires_indexed = {("default", self.table_name): False}
+        return cull_cache
+
+    def test_cull_evicts_soonest_expiring(self):
+        cull_cache = caches["no_cull"]
+        for i in range(10, 50):
+            cull_cache.set(f"cull{i}", "value", 1000 - i)
+
+        assert cull_cache.cull() == 20
+        assert self.table_count() == 20
+        assert cull_cache.get("cull10") == "value"
+        assert cull_cache.get("cull49") is None
+
+    def test_cull_without_expires_index(self):
+        cull_cache = self.no_expires_index_cache()
+        for i in range(10, 50):
+            cull_cache.set(f"cull{i}", "value", 1000 - i)
+
+        assert cull_cache.cull() == 20
+        assert self.table_count() == 20
+        # Culled by key order instead
+        assert cull_cache.get("cull10") is None
+        assert cull_cache.get("cull49") == "value"
+
+    @override_cache_settings(
+        options={"MAX_ENTRIES": 30, "APPROX_COUNT_MIN_ENTRIES": 10}
+    )
+    def test_cull_approx_count(self):
+        cache.set_many({f"cull{i}": "value" for i in range(40)})
+
+        with CaptureQueriesContext(connection) as ctx:
+            cache.cull()
+
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        assert any("INFORMATION_SCHEMA.TABLES" in sql for sql in sqls)
+        assert not any("COUNT(*)" in sql for sql in sqls)
+
+    @override_cache_settings(
+        options={"CULL_INTERVAL": 3600, "CULL_PROBABILITY": 1, "MAX_ENTRIES": 1}
+    )
+    def test_cull_interval_starts_thread(self):
+        cache.set_many({"a": 1, "b": 2})
+        cache.set("c", 3)
+
+        # Culling is left to the thread
+        assert self.table_count() == 3
+        thread = self.cull_thread()
+        assert thread.daemon
+        assert thread.is_alive()
+
+    @override_cache_settings(options={"CULL_INTERVAL": 3600})
+    def test_cull_interval_replaces_dead_thread(self):
+        # As left in the registry of a forked process
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        _cull_threads[("default", self.table_name)] = (dead, threading.Event())
+
+        cache.set("a", 1)
+
+        thread = self.cull_thread()
+        assert thread is not dead
+        assert thread.is_alive()
+
+    def cull_thread(self):
+        thread_key = ("default", self.table_name)
+        thread, stopped = _cull_threads[thread_key]
+        # Run in reverse order: stop the thread, wait for it, then forget it
+        self.addCleanup(_cull_threads.pop, thread_key, None)
+        self.addCleanup(thread.join)
+        self.addCleanup(stopped.set)
+        return thread
+
+    def test_background_cull(self):
+        cache.set("key", "value", 0.1)
+        time.sleep(0.2)
+
+        assert cache._background_cull("default") == 1
+        assert self.table_count() == 0
+
+    def test_background_cull_skips_when_locked(self):
+        cache.set("key", "value", 0.1)
+        time.sleep(0.2)
+
+        lock_name = Lock.make_name("default", cache._cull_lock_name("default"))
+        other_connection = connections.create_connection("default")
+        try:
+            with other_connection.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0)", (lock_name,))
+            assert cache._background_cull("default") is None
+        finally:
+            other_connection.close()
+
+        assert self.table_count() == 1
+
+    def test_cull_lock_name_length(self):
+        long_name = "a_rather_long_database_name_for_tests"
+        with mock.patch.dict(connection.settings_dict, {"NAME": long_name}):
+            lock = Lock(cache._cull_lock_name("default"))
+        assert lock.name.startswith(f"{long_name}.dm.cull.")
+        assert len(lock.name) == 64
+
+    def test_cull_chunked_deletes_expired(self):
+        cull_cache = caches["no_cull"]
+        for i in range(10):
+            cull_cache.set(f"expired{i}", "value", 0.1)
+            cull_cache.set(f"live{i}", "value", 1000)
+        time.sleep(0.2)
+
+        assert cull_cache.cull_chunked(chunk_max=3) == 10
+        assert self.table_count() == 10
+
+    def test_cull_chunked_key_based(self):
+        cull_cache = caches["no_cull"]
+        for i in range(10, 50):
+            cull_cache.set(f"cull{i}", "value", 1000 + i)
+
+        assert cull_cache.cull_chunked(chunk_max=3) == 20
+        assert self.table_count() == 20
+        assert cull_cache.get("cull10") is None
+        assert cull_cache.get("cull49") == "value"
+
+    def test_cull_chunked_without_expires_index(self):
+        cull_cache = self.no_expires_index_cache()
+        cull_cache.set("expired", "value", 0.1)
+        time.sleep(0.2)
+        for i in range(10, 50):
+            cull_cache.set(f"cull{i}", "value", 1000 - i)
+
+        assert cull_cache.cull_chunked(chunk_max=3) == 21
+        assert self.table_count() == 20
+        assert cull_cache.get("cull10") is None
+        assert cull_cache.get("cull49") == "value"
+
+    def test_cull_chunked_zero_cull_frequency(self):
+        cull_cache = caches["zero_cull"]
+        cull_cache.set_many({f"cull{i}": "value" for i in range(40)}, 1000)
+
+        assert cull_cache.cull_chunked(chunk_max=3) == 40
+        assert self.table_count() == 0
+
+    def test_cull_chunked_time_budget(self):
+        cull_cache = caches["no_cull"]
+        cull_cache.set("key", "value", 0.1)
+        time.sleep(0.2)
+
+        with self.assertNumQueries(0):
+            assert cull_cache.cull_chunked(time_budget=-1) == 0
+        assert self.table_count() == 1
+
+    def test_cull_chunked_load_high(self):
+        cull_cache = caches["no_cull"]
+        cull_cache.set("key", "value", 0.1)
+        time.sleep(0.2)
+
+        start = time.time()
+        assert (
+            cull_cache.cull_chunked(
+                time_budget=0.5, status_thresholds={"Threads_running": -1}
+            )
+            == 0
+        )
+        assert time.time() - start < 5
+        assert self.table_count() == 1
+
     def test_incr_range(self):
         cache.set("overwhelm", BIGINT_SIGNED_MAX - 1)
         cache.incr("overwhelm")
@@ -1084,6 +1702,454 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
             )
         assert str(excinfo.value).startswith("Cannot use the default KEY_FUNCTION")
 
+    def overwrite_table_values(self, value):
+        # Change stored values behind the backend's back, apart from the
+        # LOCAL_SYNC_INTERVAL generation rows
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""UPDATE `{self.table_name}` SET value = %s, value_type = 'p'
+                    WHERE cache_key NOT LIKE '%%django_mysql_generation%%'""",
+                (pickle.dumps(value),),
+            )
+
+    def other_process_cache(self):
+        other = MySQLCache(self.table_name, {"OPTIONS": {"LOCAL_SYNC_INTERVAL": 0.1}})
+        # Processes don't share local tiers
+        other._local = LocalTier()
+        return other
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_serves_repeat_get(self):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        self.overwrite_table_values("changed")
+
+        with self.assertNumQueries(0):
+            assert cache.get("key") == "value"
+            assert cache.has_key("key")  # noqa
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_serves_repeat_get_many(self):
+        cache.set_many({"a": 1, "b": 2})
+        assert cache.get_many(["a", "b"]) == {"a": 1, "b": 2}
+
+        with self.assertNumQueries(0):
+            assert cache.get_many(["a", "b"]) == {"a": 1, "b": 2}
+
+        cache.set("c", 3)
+        with self.assertNumQueries(1):
+            assert cache.get_many(["a", "b", "c", "d"]) == {"a": 1, "b": 2, "c": 3}
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_does_not_share_objects(self):
+        cache.set("key", [1])
+        value = cache.get("key")
+        value.append(2)
+        assert cache.get("key") == [1]
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_invalidated_by_writes(self):
+        cache.set("key", 1)
+        assert cache.get("key") == 1
+        cache.set("key", 2)
+        assert cache.get("key") == 2
+        cache.set_many({"key": 3})
+        assert cache.get("key") == 3
+        cache.incr("key")
+        assert cache.get("key") == 4
+        cache.decr("key")
+        assert cache.get("key") == 3
+        cache.delete("key")
+        assert cache.get("key") is None
+        cache.add("key", 5)
+        assert cache.get("key") == 5
+        cache.delete_many(["key"])
+        assert cache.get("key") is None
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_skips_reads_racing_writes(self):
+        cache.set("key", "old")
+        key = cache.make_key("key")
+        old_row = (*cache.encode("old"), cache.FOREVER_TIMEOUT)
+
+        # Another thread reads the old row, then this write drops the key
+        # before that thread stores what it read
+        local_writes = cache._local.writes
+        cache.set("key", "new")
+        cache._local_set(key, *old_row, local_writes)
+
+        assert cache._local_get(key) is None
+        assert cache.get("key") == "new"
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_invalidated_by_touch(self):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        cache.touch("key", 0.1)
+        time.sleep(0.2)
+        assert cache.get("key") is None
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    def test_local_tier_invalidated_by_prefix_delete_and_clear(self):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        cache.delete_with_prefix("k")
+        assert cache.get("key") is None
+
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        cache.clear()
+        assert cache.get("key") is None
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10, "LOCAL_TTL": 60})
+    def test_local_tier_respects_expires(self):
+        cache.set("key", "value", 0.1)
+        assert cache.get("key") == "value"
+        time.sleep(0.2)
+        assert cache.get("key") is None
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10, "LOCAL_TTL": 0.1})
+    def test_local_tier_ttl(self):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        self.overwrite_table_values("changed")
+        time.sleep(0.2)
+        assert cache.get("key") == "changed"
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 2})
+    def test_local_tier_evicts_least_recently_used(self):
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+        assert cache.get("a") == 1
+        assert cache.get("b") == 2
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        self.overwrite_table_values("changed")
+
+        assert cache.get("a") == 1
+        assert cache.get("b") == "changed"
+
+    @override_cache_settings(
+        options={
+            "LOCAL_MAX_ENTRIES": 10,
+            "LOCAL_TTL": 60,
+            "LOCAL_SYNC_INTERVAL": 0.1,
+        }
+    )
+    def test_local_tier_sync_sees_other_process_writes(self):
+        other = self.other_process_cache()
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        other.set("key", "changed")
+        time.sleep(0.2)
+
+        assert cache.get("key") == "changed"
+
+    @override_cache_settings(
+        options={
+            "LOCAL_MAX_ENTRIES": 10,
+            "LOCAL_TTL": 60,
+            "LOCAL_SYNC_INTERVAL": 0.1,
+        }
+    )
+    def test_local_tier_sync_keeps_entries_after_own_writes(self):
+        cache.set_many({"a": 1, "b": 2})
+        assert cache.get_many(["a", "b"]) == {"a": 1, "b": 2}
+        cache.set("a", 3)
+        self.overwrite_table_values("changed")
+        time.sleep(0.2)
+
+        # Only the generation poll runs
+        with self.assertNumQueries(1):
+            assert cache.get("b") == 2
+
+    @override_cache_settings(
+        options={
+            "LOCAL_MAX_ENTRIES": 10,
+            "LOCAL_TTL": 60,
+            "LOCAL_SYNC_INTERVAL": 0.1,
+        }
+    )
+    def test_local_tier_sync_drops_written_shards(self):
+        other = self.other_process_cache()
+        assert cache._generation_shard(cache.make_key("a")) != cache._generation_shard(
+            cache.make_key("b")
+        )
+        cache.set_many({"a": 1, "b": 2})
+        assert cache.get_many(["a", "b"]) == {"a": 1, "b": 2}
+
+        other.set("a", 3)
+        self.overwrite_table_values("changed")
+        time.sleep(0.2)
+
+        assert cache.get_many(["a", "b"]) == {"a": "changed", "b": 2}
+
+    @override_cache_settings(
+        options={
+            "LOCAL_MAX_ENTRIES": 10,
+            "LOCAL_TTL": 60,
+            "LOCAL_SYNC_INTERVAL": 0.1,
+        }
+    )
+    def test_local_tier_sync_generation_rows(self):
+        cache.set("key", "value")
+        cache.set_many({"a": 1, "b": 2})
+        before = self.generations()
+        assert set(before) == {
+            ":django_mysql_generation:0",
+            ":django_mysql_generation:3",
+            ":django_mysql_generation:9",
+        }
+
+        cache.clear()
+
+        after = self.generations()
+        assert len(after) == MySQLCache.generation_shards
+        for key, generation in before.items():
+            assert after[key] == generation + 1
+        assert cache.get("key") is None
+
+    def generations(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""SELECT cache_key, value FROM `{self.table_name}`
+                    WHERE cache_key LIKE '%%django_mysql_generation%%'"""
+            )
+            return {key: int(value) for key, value in cursor.fetchall()}
+
+    @override_cache_settings(
+        options={
+            "LOCAL_MAX_ENTRIES": 10,
+            "LOCAL_TTL": 60,
+            "LOCAL_SYNC_INTERVAL": 0.1,
+        }
+    )
+    def test_local_tier_sync_after_clear(self):
+        other = self.other_process_cache()
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        other.clear()
+        time.sleep(0.2)
+
+        assert cache.get("key") is None
+
+    @override_cache_settings(options={"BATCH_MAX_ITEMS": 2})
+    def test_many_methods_batch_max_items(self):
+        the_cache = caches["no_cull"]
+        data = {f"key{i}": i for i in range(5)}
+        with self.assertNumQueries(3):
+            assert the_cache.set_many(data) == []
+        with self.assertNumQueries(3):
+            assert the_cache.get_many(data) == data
+        with self.assertNumQueries(3):
+            the_cache.delete_many(data)
+        assert self.table_count() == 0
+
+    @override_cache_settings(options={"BATCH_MAX_BYTES": 1000})
+    def test_set_many_batch_max_bytes(self):
+        the_cache = caches["no_cull"]
+        data = {"a": "x" * 2000, "b": 1, "c": 2, "d": "y" * 600, "e": "z" * 600}
+        # a alone, as it's bigger than the limit; b, c, and d; e
+        with self.assertNumQueries(3):
+            assert the_cache.set_many(data) == []
+        assert the_cache.get_many(data) == data
+
+    def test_namespace(self):
+        tenant = cache.namespace("tenant1")
+        tenant.set("a", 1)
+        tenant.set_many({"b": 2, "c": 3})
+        assert tenant.add("d", 4)
+        assert tenant.get("a") == 1
+        assert tenant.get_many(["a", "b", "c", "d", "e"]) == {
+            "a": 1,
+            "b": 2,
+            "c": 3,
+            "d": 4,
+        }
+        assert tenant.has_key("a")  # noqa
+        assert tenant.incr("a", 10) == 11
+        assert tenant.decr("a") == 10
+        assert tenant.touch("a", 1000)
+        assert tenant.get_or_set("e", 5) == 5
+        assert tenant.delete("e")
+        tenant.delete_many(["c", "d"])
+        assert tenant.get_many(["a", "b", "c", "d"]) == {"a": 10, "b": 2}
+
+        # Keys are separate from the plain cache and other namespaces
+        assert cache.get("a") is None
+        assert cache.namespace("tenant2").get("a") is None
+        assert cache.namespace("tenant1").get("a") == 10
+
+    def test_namespace_invalidate(self):
+        tenant = cache.namespace("tenant1")
+        tenant.set("a", 1)
+        generation = tenant.generation
+
+        with self.assertNumQueries(1):
+            tenant.invalidate()
+        assert tenant.generation == generation + 1
+        assert tenant.get("a") is None
+        assert cache.namespace("tenant1").get("a") is None
+
+        tenant.set("a", 2)
+        assert cache.namespace("tenant1").get("a") == 2
+
+    def test_namespace_invalidate_unused(self):
+        tenant = cache.namespace("tenant1")
+        tenant.invalidate()
+        tenant.set("a", 1)
+        assert cache.namespace("tenant1").get("a") == 1
+
+    def test_namespace_generation_culled(self):
+        tenant = cache.namespace("tenant1")
+        tenant.set("a", 1)
+        cache.delete("django_mysql_namespace:tenant1")
+        time.sleep(0.01)
+
+        tenant = cache.namespace("tenant1")
+        assert tenant.get("a") is None
+
+    def test_batch(self):
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+
+        with self.assertNumQueries(1), cache.batch() as batch:
+            a = batch.get("a")
+            b = batch.get("b")
+            c = batch.get("c", version=2)
+            d = batch.get("d", default="missing")
+
+        assert a.value == 1
+        assert b.value == 2
+        assert c.value is None
+        assert d.value == "missing"
+
+    def test_batch_resolves_on_access(self):
+        cache.set_many({"a": 1, "b": 2})
+
+        with cache.batch() as batch:
+            a = batch.get("a")
+            with self.assertNumQueries(1):
+                assert a.value == 1
+            with self.assertNumQueries(0):
+                assert batch.get("a").value == 1
+
+            b = batch.get("b")
+            with self.assertNumQueries(1):
+                assert b.value == 2
+
+    def test_batch_multiple_versions(self):
+        cache.set("a", 1)
+        cache.set("a", 2, version=2)
+
+        with self.assertNumQueries(2), cache.batch() as batch:
+            a1 = batch.get("a")
+            a2 = batch.get("a", version=2)
+
+        assert a1.value == 1
+        assert a2.value == 2
+
+    def test_batch_not_resolved_on_error(self):
+        with (
+            self.assertNumQueries(0),
+            pytest.raises(ValueError),
+            cache.batch() as batch,
+        ):
+            batch.get("a")
+            raise ValueError("oops")
+
+    async def test_async_methods(self):
+        assert await cache.aget("key") is None
+        assert await cache.aset_many({"a": 1, "b": "two"}) == []
+        assert await cache.aget_many(["a", "b", "c"]) == {"a": 1, "b": "two"}
+        assert await cache.ahas_key("a")
+        assert not await cache.ahas_key("c")
+        assert await cache.aincr("a", 10) == 11
+        assert await cache.adecr("a", 2) == 9
+        await cache.adelete_many(["a", "b"])
+        assert await cache.aget_many(["a", "b"]) == {}
+
+    async def test_aget_or_set(self):
+        assert await cache.aget_or_set("key", "value") == "value"
+        assert await cache.aget_or_set("key", "other") == "value"
+
+    async def test_aincr_missing(self):
+        with pytest.raises(ValueError):
+            await cache.aincr("missing")
+
+    async def test_aincr_initial(self):
+        assert await cache.aincr("counter", initial=10) == 11
+        assert await cache.adecr("counter", 2, initial=10) == 9
+        assert await cache.adecr("other", initial=10, timeout=60) == 9
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10, "STATS": True})
+    async def test_local_tier_async_stats(self):
+        await cache.aset_many({"a": 1, "b": 2})
+        assert await cache.aget_many(["a", "b"]) == {"a": 1, "b": 2}
+        cache.get_stats(reset=True)
+
+        assert await cache.aget("a") == 1
+        assert await cache.aget_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+
+        counters = cache.get_stats()["counters"]
+        assert counters["hits"] == 3
+        assert counters["local_hits"] == 3
+        assert counters["misses"] == 1
+
+    @override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10})
+    async def test_local_tier_serves_async_reads(self):
+        await cache.aset("a", 1)
+        await cache.aset("b", 2)
+        assert await cache.aget_many(["a", "b"]) == {"a": 1, "b": 2}
+        await sync_to_async(self.overwrite_table_values)("changed")
+
+        assert await cache.aget("a") == 1
+        assert await cache.aget_many(["a", "b"]) == {"a": 1, "b": 2}
+        assert await cache.ahas_key("b")
+
+    @override_settings(DATABASE_ROUTERS=[ReplicaCacheRouter()])
+    @override_cache_settings(options={"READ_YOUR_WRITES": 0.1})
+    def test_read_your_writes(self):
+        made_key = cache.make_key("key")
+        assert cache._db_for_read([made_key]) == "other"
+
+        cache.set("key", "value")
+        assert cache._db_for_read([made_key]) == "default"
+        assert cache._db_for_read([made_key, "other key"]) == "default"
+        assert cache._db_for_read(["other key"]) == "other"
+        assert cache.get("key") == "value"
+        assert cache.get_many(["key"]) == {"key": "value"}
+        assert cache.keys_with_prefix("") == {"key"}
+
+        time.sleep(0.2)
+        assert cache._db_for_read([made_key]) == "other"
+
+    @override_settings(DATABASE_ROUTERS=[ReplicaCacheRouter()])
+    @override_cache_settings(options={"READ_YOUR_WRITES": 0.1})
+    def test_read_your_writes_after_clear(self):
+        cache.clear()
+        assert cache._db_for_read([cache.make_key("key")]) == "default"
+        assert cache.get("key") is None
+
+    @override_settings(DATABASE_ROUTERS=[ReplicaCacheRouter()])
+    def test_read_your_writes_disabled_by_default(self):
+        cache.set("key", "value")
+        assert cache._db_for_read([cache.make_key("key")]) == "other"
+
+    def test_local_tier_disabled_by_default(self):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        self.overwrite_table_values("changed")
+        assert cache.get("key") == "changed"
+
+    def test_local_tier_disabled_skips_lock(self):
+        with mock.patch.object(cache._local, "lock") as lock:
+            cache.set("key", "value")
+            assert cache.get("key") == "value"
+            assert cache.get_many(["key"]) == {"key": "value"}
+            cache.delete("key")
+        lock.__enter__.assert_not_called()
+
     @parametrize(
         "cache_name",
         ["default", "prefix", "custom_key", "custom_key2"],
@@ -1183,6 +2249,65 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
             cache.get_with_prefix("")
         assert str(excinfo.value).startswith("To use the _with_prefix commands")
 
+    @parametrize(
+        "cache_name",
+        ["default", "prefix", "custom_key", "custom_key2"],
+    )
+    def test_iter_with_prefix(self, cache_name):
+        cache = caches[cache_name]
+        assert list(cache.iter_with_prefix("")) == []
+
+        cache.set("A2", [True])
+        cache.set_many({f"K{i}": i for i in range(5)})
+        cache.set("K99", ["Value", 99], 0.1)
+        cache.set("K5", "other version", version=2)
+        time.sleep(0.2)
+
+        with self.assertNumQueries(3):
+            assert dict(cache.iter_with_prefix("K", batch_size=2)) == {
+                f"K{i}": i for i in range(5)
+            }
+        assert dict(cache.iter_with_prefix("K", version=2)) == {"K5": "other version"}
+
+    @parametrize(
+        "cache_name",
+        ["default", "prefix", "custom_key", "custom_key2"],
+    )
+    def test_iter_keys_with_prefix(self, cache_name):
+        cache = caches[cache_name]
+        assert list(cache.iter_keys_with_prefix("")) == []
+
+        cache.set("A2", True)
+        cache.set_many({f"K{i}": i for i in range(4)})
+
+        with self.assertNumQueries(3):
+            keys = list(cache.iter_keys_with_prefix("K", batch_size=2))
+        assert sorted(keys) == ["K0", "K1", "K2", "K3"]
+
+    @override_cache_settings(KEY_FUNCTION=custom_key_func)
+    def test_iter_with_prefix_with_bad_cache(self):
+        with pytest.raises(ValueError) as excinfo:
+            next(cache.iter_with_prefix(""))
+        assert str(excinfo.value).startswith("To use the _with_prefix commands")
+
+    @parametrize(
+        "cache_name",
+        ["default", "prefix", "custom_key", "custom_key2"],
+    )
+    def test_count_with_prefix(self, cache_name):
+        cache = caches[cache_name]
+        assert cache.count_with_prefix("") == 0
+
+        cache.set("A2", True)
+        cache.set("K1", True)
+        cache.set("K23", True, version=2)
+        cache.set("K99", True, 0.1)
+        time.sleep(0.2)
+
+        assert cache.count_with_prefix("") == 2
+        assert cache.count_with_prefix("K") == 1
+        assert cache.count_with_prefix("K", version=2) == 1
+
     @parametrize(
         "cache_name",
         ["default", "prefix", "custom_key", "custom_key2"],
@@ -1301,12 +2426,164 @@ class MySQLCacheTests(MySQLCacheTableMixin, ParametrizedTestCase, TestCase):
         assert output.strip() == "Deleting from cache 'default'... 1 entries deleted."
         assert self.table_count() == 0
 
+    def test_cull_mysql_caches_chunked(self):
+        cache.set("key", "value", 0.1)
+        time.sleep(0.2)
+
+        out = StringIO()
+        call_command(
+            "cull_mysql_caches",
+            "default",
+            "--chunked",
+            "--time-budget",
+            "60",
+            verbosity=1,
+            stdout=out,
+        )
+        output = out.getvalue()
+        assert output.strip() == "Deleting from cache 'default'... 1 entries deleted."
+        assert self.table_count() == 0
+
+    def test_cull_mysql_caches_time_budget_without_chunked(self):
+        with pytest.raises(CommandError) as excinfo:
+            call_command("cull_mysql_caches", "--time-budget", "60", verbosity=0)
+        assert str(excinfo.value) == "--time-budget requires --chunked."
+
+    def test_analyze(self):
+        cache.set_many({"user:1": "a", "user:2": "b"})
+        cache.set("page:home", "c" * 10000)
+        cache.set("forever", 1, None)
+        cache.set("expired", "d", 0.1)
+        time.sleep(0.2)
+
+        analysis = cache.analyze()
+
+        assert analysis["estimated_rows"] == 5
+        assert analysis["sampled_rows"] == 5
+        assert analysis["expired_fraction"] == 0.2
+        assert analysis["groups"][0] == {
+            "key_prefix": "",
+            "version": 1,
+            "prefix": "user",
+            "sampled_rows": 2,
+            "estimated_rows": 2,
+            "mean_size": ANY,
+            "expired_fraction": 0.0,
+        }
+        assert {group["prefix"] for group in analysis["groups"]} == {
+            "user",
+            "page",
+            "forever",
+            "expired",
+        }
+        assert set(analysis["value_sizes"]) == {"i", "p", "z"}
+        assert analysis["value_sizes"]["p"]["count"] == 3
+        assert analysis["expiry_horizons"] == {
+            "expired": 1,
+            "1 minute": 0,
+            "1 hour": 3,
+            "1 day": 0,
+            "1 week": 0,
+            "longer": 0,
+            "never": 1,
+        }
+
+    @override_cache_settings(options={"LOCAL_SYNC_INTERVAL": 1})
+    def test_analyze_unparseable_keys(self):
+        # Writes the generation row for key's shard
+        cache.set("key", "value")
+
+        analysis = cache.analyze()
+
+        assert analysis["sampled_rows"] == 2
+        groups = {
+            (group["key_prefix"], group["version"], group["prefix"]): group[
+                "sampled_rows"
+            ]
+            for group in analysis["groups"]
+        }
+        assert groups == {("", 1, "key"): 1, (None, None, None): 1}
+
+        out = StringIO()
+        call_command("analyze_mysql_caches", "default", stdout=out)
+        assert "  (unparseable)" in out.getvalue()
+
+    def test_analyze_empty(self):
+        analysis = cache.analyze()
+        assert analysis["sampled_rows"] == 0
+        assert analysis["groups"] == []
+
+    def test_analyze_samples_large_tables(self):
+        cache.set_many({f"key{i}": i for i in range(300)})
+
+        analysis = cache.analyze(sample_size=100)
+
+        assert 0 < analysis["sampled_rows"] <= 100
+        assert analysis["estimated_rows"] >= 101
+
+    def test_analyze_mysql_caches(self):
+        cache.set_many({"user:1": "a", "user:2": "b"})
+
+        out = StringIO()
+        call_command("analyze_mysql_caches", "default", stdout=out)
+        output = out.getvalue()
+
+        assert "Cache 'default', table 'test cache table':" in output
+        assert "  Rows: ~2 (" in output
+        assert "  Expired: 0.0%" in output
+        assert "  :1:user" in output
+
     def test_cull_mysql_caches_bad_cache_name(self):
         with pytest.raises(CommandError) as excinfo:
             call_command("cull_mysql_caches", "NOTACACHE", verbosity=0)
         assert str(excinfo.value) == "Cache 'NOTACACHE' does not exist"
 
 
+@override_cache_settings(options={"LOCAL_MAX_ENTRIES": 10, "LOCAL_TTL": 60})
+class MySQLCacheLocalTierThreadTests(MySQLCacheTableMixin, TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.create_table()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.drop_table()
+
+    def setUp(self):
+        super().setUp()
+        _local_tiers.clear()
+        self.addCleanup(cache.clear)
+
+    def run_in_thread(self, func):
+        def target():
+            try:
+                func()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+    def test_write_in_other_thread_invalidates(self):
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        # Django creates a separate cache instance for the other thread
+        self.run_in_thread(lambda: caches["default"].set("key", "changed"))
+
+        assert cache.get("key") == "changed"
+
+    def test_read_in_other_thread_shared(self):
+        cache.set("key", "value")
+        self.run_in_thread(lambda: caches["default"].get("key"))
+
+        with self.assertNumQueries(0):
+            assert cache.get("key") == "value"
+
+
 @override_cache_settings()
 class MySQLCacheMigrationTests(MySQLCacheTableMixin, TransactionTestCase):
     @pytest.fixture(autouse=True)
@@ -1359,3 +2636,423 @@ class MySQLCacheMigrationTests(MySQLCacheTableMixin, TransactionTestCase):
                 (table_name,),
             )
             return bool(cursor.fetchone()[0])
+
+
+class ShardedMySQLCacheTableMixin(TransactionTestCase):
+    shard_tables = ["test cache shard 1", "test cache shard 2"]
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.cursor() as cursor:
+            for table_name in cls.shard_tables:
+                cursor.execute(
+                    MySQLCache.create_table_sql.format(table_name=table_name)
+                )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.cursor() as cursor:
+            for table_name in cls.shard_tables:
+                cursor.execute(f"DROP TABLE `{table_name}`")
+
+
+@override_cache_settings(
+    BACKEND="django_mysql.cache.ShardedMySQLCache",
+    options={
+        "SHARDS": [
+            {"LOCATION": "test cache shard 1"},
+            {"DATABASE": "default", "LOCATION": "test cache shard 2"},
+        ]
+    },
+)
+class ShardedMySQLCacheTests(ShardedMySQLCacheTableMixin, TestCase):
+    def table_counts(self):
+        counts = []
+        with connection.cursor() as cursor:
+            for table_name in self.shard_tables:
+                cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+                counts.append(cursor.fetchone()[0])
+        return counts
+
+    def test_requires_shards(self):
+        with pytest.raises(ValueError) as excinfo:
+            ShardedMySQLCache("test cache table", {})
+        assert "SHARDS" in str(excinfo.value)
+
+    def test_single_key_methods(self):
+        assert cache.get("key") is None
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        assert cache.has_key("key")  # noqa
+        assert not cache.add("key", "other")
+        assert cache.add("num", 1)
+        assert cache.incr("num", 10) == 11
+        assert cache.decr("num") == 10
+        assert cache.touch("num", 1000)
+        assert cache.delete("key")
+        assert cache.get("key") is None
+
+    def test_many_methods_spread_over_shards(self):
+        data = {f"key{i}": i for i in range(100)}
+        assert cache.set_many(data) == []
+
+        counts = self.table_counts()
+        assert sum(counts) == 100
+        assert all(count > 20 for count in counts)
+
+        with self.assertNumQueries(2):
+            assert cache.get_many([*data, "missing"]) == data
+
+        cache.delete_many([f"key{i}" for i in range(50)])
+        assert sum(self.table_counts()) == 50
+
+        cache.clear()
+        assert self.table_counts() == [0, 0]
+
+    def test_keys_move_only_to_new_shard(self):
+        def shard_layout(num_shards):
+            sharded = ShardedMySQLCache(
+                "table",
+                {
+                    "OPTIONS": {
+                        "SHARDS": [{"LOCATION": f"shard{i}"} for i in range(num_shards)]
+                    }
+                },
+            )
+            return {
+                key: sharded._shard_for(key)._table
+                for key in (f"key{i}" for i in range(1000))
+            }
+
+        before = shard_layout(2)
+        after = shard_layout(3)
+        moved = [key for key in before if before[key] != after[key]]
+
+        assert all(after[key] == "shard2" for key in moved)
+        assert 200 < len(moved) < 450
+
+    def test_prefix_methods(self):
+        cache.set_many({f"K{i}": i for i in range(10)})
+        cache.set("A1", "other")
+
+        assert cache.keys_with_prefix("K") == {f"K{i}" for i in range(10)}
+        assert cache.get_with_prefix("K") == {f"K{i}": i for i in range(10)}
+        assert set(cache.iter_keys_with_prefix("K")) == {f"K{i}" for i in range(10)}
+        assert dict(cache.iter_with_prefix("K")) == {f"K{i}": i for i in range(10)}
+        assert cache.count_with_prefix("K") == 10
+        assert cache.delete_with_prefix("K") == 10
+        assert cache.keys_with_prefix("") == {"A1"}
+
+    def test_cull(self):
+        cache.set_many({f"key{i}": i for i in range(20)}, 0.1)
+        time.sleep(0.2)
+
+        assert cache.cull() == 20
+        assert self.table_counts() == [0, 0]
+
+    def test_mysql_cache_migration(self):
+        out = StringIO()
+        call_command("mysql_cache_migration", "default", stdout=out)
+        output = out.getvalue()
+
+        assert "CREATE TABLE `test cache shard 1`" in output
+        assert "CREATE TABLE `test cache shard 2`" in output
+
+
+@override_cache_settings(
+    BACKEND="django_mysql.cache.ShardedMySQLCache",
+    options={
+        "SHARDS": [
+            {"DATABASE": "default", "LOCATION": "test cache shard 1"},
+            {"DATABASE": "other", "LOCATION": "test cache shard 1"},
+        ],
+        "LOCAL_MAX_ENTRIES": 100,
+        "LOCAL_TTL": 60,
+        "LOCAL_SYNC_INTERVAL": 0.1,
+    },
+)
+class ShardedMySQLCacheLocalTierTests(TransactionTestCase):
+    databases = {"default", "other"}
+    table_name = "test cache shard 1"
+
+    @classmethod
+    def setUpClass(cls):
+        for alias in cls.databases:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    MySQLCache.create_table_sql.format(table_name=cls.table_name)
+                )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in cls.databases:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f"DROP TABLE `{cls.table_name}`")
+
+    def setUp(self):
+        super().setUp()
+        _local_tiers.clear()
+        self.addCleanup(cache.clear)
+
+    def test_local_tier_per_database(self):
+        first, second = cache.shards
+        assert first._local is not second._local
+
+    def test_local_tier_sync_per_database(self):
+        data = {f"key{i}": i for i in range(20)}
+        cache.set_many(data)
+        assert cache.get_many(data) == data
+
+        # Another process writes every key, but only on the second database
+        other = MySQLCache(
+            self.table_name,
+            {"OPTIONS": {"DATABASE": "other", "LOCAL_SYNC_INTERVAL": 0.1}},
+        )
+        other._local = LocalTier()
+        other.set_many(dict.fromkeys(data, "changed"))
+        time.sleep(0.2)
+
+        second_keys = [key for key in data if cache._shard_for(key) is cache.shards[1]]
+        assert second_keys
+        result = cache.get_many(data)
+        assert {key: result[key] for key in second_keys} == dict.fromkeys(
+            second_keys, "changed"
+        )
+
+
+@override_cache_settings(
+    BACKEND="django_mysql.cache.ShardedMySQLCache",
+    options={
+        "SHARDS": [
+            {"LOCATION": "test cache shard 1"},
+            {"DATABASE": "default", "LOCATION": "test cache shard 2"},
+        ],
+        "SHARD_WORKERS": 2,
+    },
+)
+class ShardedMySQLCacheWorkersTests(ShardedMySQLCacheTableMixin):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+
+    def test_many_methods(self):
+        data = {f"key{i}": i for i in range(20)}
+        assert cache.set_many(data) == []
+        assert cache.get_many(data) == data
+        cache.delete_many(data)
+        assert cache.get_many(data) == {}
+
+    def test_workers_close_connections(self):
+        cache.set_many({f"key{i}": i for i in range(20)})
+
+        def connection_open():
+            return connections["default"].connection is not None
+
+        futures = [cache._executor().submit(connection_open) for _ in range(4)]
+        assert not any(future.result() for future in futures)
+
+    def test_workers_keep_persistent_connections(self):
+        executor = cache._executor()
+        self.addCleanup(_shard_executors.pop, cache._executor_layout(), None)
+        self.addCleanup(executor.shutdown)
+
+        with mock.patch.dict(connection.settings_dict, {"CONN_MAX_AGE": None}):
+            cache.set_many({f"key{i}": i for i in range(20)})
+
+        def connection_open():
+            return connections["default"].connection is not None
+
+        futures = [executor.submit(connection_open) for _ in range(4)]
+        assert any(future.result() for future in futures)
+
+    def test_serial_in_transaction(self):
+        data = {f"key{i}": i for i in range(20)}
+        with mock.patch.object(cache, "_executor") as executor, atomic():
+            cache.set_many(data)
+            # Worker threads wouldn't see the uncommitted rows
+            assert cache.get_many(data) == data
+        executor.assert_not_called()
+
+
+@override_cache_settings(options={"HOT_MAX_SIZE": 100})
+class MySQLCacheHotTableTests(TestCase):
+    table_name = "test cache table"
+    hot_table_name = "test cache table_hot"
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                MySQLCache.create_table_sql.format(table_name=cls.table_name)
+            )
+            cursor.execute(
+                MySQLCache.hot_create_table_sql.format(
+                    table_name=cls.hot_table_name, max_size=100
+                )
+            )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE `{cls.table_name}`")
+            cursor.execute(f"DROP TABLE `{cls.hot_table_name}`")
+
+    def setUp(self):
+        super().setUp()
+        # MEMORY tables don't support transactions, so aren't rolled back
+        # between tests
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM `{self.hot_table_name}`")
+
+    def table_keys(self, table_name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT cache_key FROM `{table_name}`")
+            return {cache.reverse_key_func(row[0])[0] for row in cursor.fetchall()}
+
+    def assert_tables(self, main, hot):
+        assert self.table_keys(self.table_name) == main
+        assert self.table_keys(self.hot_table_name) == hot
+
+    def test_hot_max_size_too_small(self):
+        with pytest.raises(ValueError) as excinfo:
+            MySQLCache(self.table_name, {"OPTIONS": {"HOT_MAX_SIZE": 10}})
+        assert str(excinfo.value) == (
+            "HOT_MAX_SIZE must be at least 20 bytes, so integers fit."
+        )
+
+    def test_set_routes_by_size(self):
+        cache.set("small", "value")
+        cache.set("big", "value" * 100)
+        cache.set("int", 1)
+        self.assert_tables({"big"}, {"small", "int"})
+
+        assert cache.get("small") == "value"
+        assert cache.get("big") == "value" * 100
+        assert cache.get_many(["small", "big", "int", "missing"]) == {
+            "small": "value",
+            "big": "value" * 100,
+            "int": 1,
+        }
+        assert cache.has_key("small")
+        assert cache.has_key("big")
+        assert not cache.has_key("missing")
+
+    def test_set_moves_between_tables(self):
+        cache.set("key", "value")
+        cache.set("key", "value" * 100)
+        self.assert_tables({"key"}, set())
+        assert cache.get("key") == "value" * 100
+
+        cache.set("key", "value")
+        self.assert_tables(set(), {"key"})
+        assert cache.get("key") == "value"
+
+    def test_set_many(self):
+        cache.set_many({"a": "value", "b": "value" * 100})
+        self.assert_tables({"b"}, {"a"})
+
+        cache.set_many({"a": "value" * 100, "b": "value"})
+        self.assert_tables({"a"}, {"b"})
+        assert cache.get_many(["a", "b"]) == {"a": "value" * 100, "b": "value"}
+
+    def test_add(self):
+        cache.set("key", "value" * 100)
+        assert not cache.add("key", "value")
+        assert cache.get("key") == "value" * 100
+
+        cache.set("expired", "value" * 100, 0.1)
+        time.sleep(0.2)
+        assert cache.add("expired", "value")
+        self.assert_tables({"key"}, {"expired"})
+
+    def test_delete_and_touch(self):
+        cache.set_many({"a": "value", "b": "value" * 100, "c": "value"})
+        assert cache.touch("a", 1000)
+        assert cache.touch("b", 1000)
+        assert cache.delete("a")
+        assert cache.delete("b")
+        assert not cache.delete("a")
+        cache.delete_many(["c"])
+        self.assert_tables(set(), set())
+
+    def test_incr(self):
+        cache.set("key", "value" * 100)
+        assert cache.incr("key", initial=0) == 1
+        self.assert_tables(set(), {"key"})
+        assert cache.incr("key") == 2
+
+        cache.set("other", "value" * 100)
+        assert cache.incr_many({"key": 1, "other": 1}, initial=0) == {
+            "key": 3,
+            "other": 1,
+        }
+        self.assert_tables(set(), {"key", "other"})
+
+    def test_incr_counters_from_before_hot_table(self):
+        MySQLCache(self.table_name, {}).set_many({"a": 1, "b": 2, "c": 3, "d": 4})
+        self.assert_tables({"a", "b", "c", "d"}, set())
+
+        assert cache.incr("a") == 2
+        assert cache.decr("b") == 1
+        assert cache.incr_many({"a": 1, "b": 1}) == {"a": 3, "b": 2}
+        self.assert_tables({"a", "b", "c", "d"}, set())
+        assert cache.get_many(["a", "b"]) == {"a": 3, "b": 2}
+
+        assert cache.incr("c", initial=0) == 4
+        assert cache.incr_many({"d": 1, "e": 1}, initial=0) == {"d": 5, "e": 1}
+        self.assert_tables({"a", "b"}, {"c", "d", "e"})
+        assert cache.get_many(["c", "d", "e"]) == {"c": 4, "d": 5, "e": 1}
+
+    def test_clear(self):
+        cache.set_many({"a": "value", "b": "value" * 100})
+        cache.clear()
+        self.assert_tables(set(), set())
+
+    def test_prefix_methods(self):
+        cache.set_many({"K1": "value", "K2": "value" * 100, "K3": 3, "A1": "value"})
+
+        assert cache.keys_with_prefix("K") == {"K1", "K2", "K3"}
+        assert cache.get_with_prefix("K") == {
+            "K1": "value",
+            "K2": "value" * 100,
+            "K3": 3,
+        }
+        assert list(cache.iter_keys_with_prefix("K", batch_size=2)) == [
+            "K1",
+            "K2",
+            "K3",
+        ]
+        assert cache.count_with_prefix("K") == 3
+        assert cache.delete_with_prefix("K") == 3
+        self.assert_tables(set(), {"A1"})
+
+    def test_cull(self):
+        cache.set_many({"a": "value", "b": "value" * 100}, 0.1)
+        time.sleep(0.2)
+
+        assert cache.cull() == 2
+        self.assert_tables(set(), set())
+
+    def test_cull_chunked(self):
+        cache.set_many({"a": "value", "b": "value" * 100}, 0.1)
+        cache.set("c", "value")
+        time.sleep(0.2)
+
+        assert cache.cull_chunked() == 2
+        self.assert_tables(set(), {"c"})
+
+    def test_mysql_cache_migration(self):
+        out = StringIO()
+        call_command("mysql_cache_migration", "default", stdout=out)
+        output = out.getvalue()
+
+        assert "CREATE TABLE `test cache table`" in output
+        assert "CREATE TABLE `test cache table_hot`" in output
+        assert "value varbinary(100) NOT NULL" in output
+        assert ") ENGINE=MEMORY;" in output
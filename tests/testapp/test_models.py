@@ -1,20 +1,36 @@
 from __future__ import annotations
 
+import base64
+import datetime as dt
+import os
 import pickle
 import re
 import shutil
+import tempfile
+import threading
 from unittest import SkipTest, mock
 
 import pytest
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.paginator import InvalidPage
 from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.models import Exists, OuterRef
 from django.db.models.query import QuerySet
+from django.db.transaction import atomic
 from django.template import Context, Template
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.test.utils import captured_stdout, override_settings
 
-from django_mysql.models import ApproximateInt, SmartIterator, add_QuerySetMixin
+from django_mysql.models import (
+    ApproximateInt,
+    CacheCheckpoint,
+    Checkpoint,
+    FileCheckpoint,
+    SmartIterator,
+    add_QuerySetMixin,
+    clear_approx_count_cache,
+)
 from django_mysql.utils import index_name
 from tests.testapp.models import (
     Author,
@@ -86,6 +102,45 @@ class ApproximateCountTests(TestCase):
         with pytest.raises(ValueError):
             filtered.approx_count(fall_back=False)
 
+    def test_fallback_with_unindexed_filter(self):
+        # bio isn't indexed, so MySQL can only guess how many rows match
+        filtered = Author.objects.filter(bio="")
+        assert filtered.approx_count(fall_back=True, filtered="indexed") == 10
+        with pytest.raises(ValueError):
+            filtered.approx_count(fall_back=False, filtered="indexed")
+
+    def test_approx_count_with_indexed_filter(self):
+        Author.objects.bulk_create([Author(name=f"name{i}") for i in range(10)])
+        filtered = Author.objects.filter(name__startswith="name1")
+
+        count = filtered.approx_count(fall_back=False, min_size=0, filtered="indexed")
+        assert isinstance(count, ApproximateInt)
+        assert count == 1
+
+        count = filtered.count_tries_approx(min_size=0, filtered="indexed").count()
+        assert isinstance(count, ApproximateInt)
+
+    def test_approx_count_with_filter_always(self):
+        count = Author.objects.filter(bio="").approx_count(
+            fall_back=False, min_size=0, filtered="always"
+        )
+        assert isinstance(count, ApproximateInt)
+
+    def test_approx_count_with_filter_never(self):
+        filtered = Author.objects.filter(name__startswith="name1")
+        with pytest.raises(ValueError):
+            filtered.approx_count(fall_back=False, min_size=0, filtered="never")
+
+    def test_approx_count_with_impossible_filter(self):
+        for filtered in (
+            Author.objects.filter(pk__in=[]),
+            Author.objects.filter(pk=-1),
+        ):
+            count = filtered.approx_count(
+                fall_back=False, min_size=0, filtered="indexed"
+            )
+            assert count == 0
+
     def test_fallback_with_slice(self):
         assert Author.objects.all()[:100].approx_count() == 10
         with pytest.raises(ValueError):
@@ -101,6 +156,34 @@ class ApproximateCountTests(TestCase):
         with pytest.raises(ValueError):
             Author.objects.extra(where=["1=1"]).approx_count(fall_back=False)
 
+    @override_settings(DJANGO_MYSQL_APPROX_COUNT_TTL=60)
+    def test_approx_count_cached(self):
+        clear_approx_count_cache()
+        self.addCleanup(clear_approx_count_cache)
+        count = Author.objects.approx_count(min_size=0)
+
+        with self.assertNumQueries(0):
+            assert Author.objects.approx_count(min_size=0) == count
+            assert Author.objects.count_tries_approx(min_size=0).count() == count
+
+        clear_approx_count_cache()
+        with self.assertNumQueries(1):
+            assert Author.objects.approx_count(min_size=0) == count
+
+    @override_settings(
+        DJANGO_MYSQL_APPROX_COUNT_TTL=60, DJANGO_MYSQL_APPROX_COUNT_CACHE="default"
+    )
+    def test_approx_count_cached_shared(self):
+        clear_approx_count_cache()
+        self.addCleanup(clear_approx_count_cache)
+        self.addCleanup(caches["default"].clear)
+        count = Author.objects.approx_count(min_size=0)
+
+        # Another process would find it in the shared cache
+        clear_approx_count_cache()
+        with self.assertNumQueries(0):
+            assert Author.objects.approx_count(min_size=0) == count
+
     def test_approx_count_with_label(self):
         # It should be possible to approx count a query set with a query hint
         # as none of them affect the result
@@ -477,6 +560,78 @@ class SmartIteratorTests(TestCase):
         all_ids = list(Author.objects.order_by("id").values_list("id", flat=True))
         assert seen == all_ids
 
+    def test_checkpoint_resume(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        checkpoint = FileCheckpoint("test_job", directory.name)
+
+        seen: list[int] = []
+        chunks = iter(
+            Author.objects.iter_smart_chunks(
+                chunk_size=3, chunk_max=3, checkpoint=checkpoint
+            )
+        )
+        for authors in chunks:
+            seen.extend(author.id for author in authors)
+            if len(seen) == 6:
+                break  # Simulate dying part way through
+        chunks.close()
+        assert checkpoint.load() == {
+            "first_pk": 1,
+            "last_pk": 10,
+            "end_pk": 4,
+            "chunk_size": 3,
+        }
+
+        # The interrupted chunk is processed again
+        for authors in Author.objects.iter_smart_chunks(checkpoint=checkpoint):
+            seen.extend(author.id for author in authors)
+        assert seen == [1, 2, 3, 4, 5, 6, *range(4, 11)]
+        assert checkpoint.load() is None
+        assert os.listdir(directory.name) == []
+
+    def test_checkpoint_resume_reverse(self):
+        checkpoint = CacheCheckpoint("test_job")
+        self.addCleanup(checkpoint.clear)
+        checkpoint.save({"first_pk": 10, "last_pk": 1, "end_pk": 5, "chunk_size": 2})
+
+        seen = [
+            a.id for a in Author.objects.reverse().iter_smart(checkpoint=checkpoint)
+        ]
+        assert seen == [5, 4, 3, 2, 1]
+        assert checkpoint.load() is None
+
+    def test_checkpoint_resume_finished(self):
+        checkpoint = CacheCheckpoint("test_job")
+        self.addCleanup(checkpoint.clear)
+        checkpoint.save({"first_pk": 1, "last_pk": 10, "end_pk": 11, "chunk_size": 2})
+
+        assert list(Author.objects.iter_smart(checkpoint=checkpoint)) == []
+        assert checkpoint.load() is None
+
+    def test_checkpoint_workers_mismatch(self):
+        checkpoint = CacheCheckpoint("test_job")
+        self.addCleanup(checkpoint.clear)
+        checkpoint.save({"first_pk": 1, "last_pk": 10, "workers": 2})
+
+        with pytest.raises(ValueError) as excinfo:
+            list(Author.objects.iter_smart(checkpoint=checkpoint))
+        assert str(excinfo.value) == (
+            "Checkpoint 'test_job' was saved with 2 worker(s), resume with the "
+            "same number."
+        )
+
+    def test_checkpoint_incomplete_subclass(self):
+        class NoClearCheckpoint(Checkpoint):
+            def load(self):
+                return None
+
+            def save(self, state):
+                pass
+
+        with pytest.raises(TypeError):
+            NoClearCheckpoint("test_job")
+
     def test_objects_non_atomic(self):
         seen = [a.id for a in Author.objects.iter_smart(atomically=False)]
         all_ids = list(Author.objects.order_by("id").values_list("id", flat=True))
@@ -755,6 +910,258 @@ class SmartIteratorTests(TestCase):
         assert bad_authors.count() == 0
 
 
+class SmartIteratorWorkersTests(TransactionTestCase):
+    # Workers use their own connections, so the rows must be committed
+    databases = {"default", "other"}
+
+    def setUp(self):
+        super().setUp()
+        Author.objects.bulk_create([Author(id=i + 1) for i in range(20)])
+
+    def test_chunks(self):
+        Author.objects.iter_smart_chunks(workers=3, chunk_max=2).run(
+            lambda chunk: chunk.update(bio="done")
+        )
+        assert Author.objects.exclude(bio="done").count() == 0
+
+    def test_objects(self):
+        seen: list[int] = []
+        lock = threading.Lock()
+
+        def process(author):
+            with lock:
+                seen.append(author.id)
+
+        Author.objects.reverse().iter_smart(workers=4, chunk_max=3).run(process)
+        assert sorted(seen) == list(range(1, 21))
+
+    def test_pk_ranges(self):
+        ranges: list[tuple[int, int]] = []
+        Author.objects.iter_smart_pk_ranges(workers=2, chunk_min=100).run(ranges.append)
+        assert sorted(ranges) == [(1, 11), (11, 21)]
+
+    def test_one_worker(self):
+        seen: list[int] = []
+        Author.objects.iter_smart().run(lambda author: seen.append(author.id))
+        assert seen == list(range(1, 21))
+
+    def test_error(self):
+        def process(chunk):
+            raise RuntimeError("Oops")
+
+        with pytest.raises(RuntimeError, match="Oops"):
+            Author.objects.iter_smart_chunks(workers=2).run(process)
+
+    def test_checkpoint_resume(self):
+        checkpoint = CacheCheckpoint("test_job")
+        self.addCleanup(checkpoint.clear)
+        seen: list[int] = []
+        lock = threading.Lock()
+
+        def process(author):
+            with lock:
+                if author.id == 15 and 15 not in seen:
+                    seen.append(15)
+                    raise RuntimeError("Oops")
+                seen.append(author.id)
+
+        with pytest.raises(RuntimeError):
+            Author.objects.iter_smart(
+                workers=2, chunk_size=2, chunk_max=2, checkpoint=checkpoint
+            ).run(process)
+        assert checkpoint.load() == {"first_pk": 1, "last_pk": 20, "workers": 2}
+
+        Author.objects.iter_smart(workers=2, checkpoint=checkpoint).run(process)
+        assert set(seen) == set(range(1, 21))
+        # Only the chunks in progress are processed again
+        assert len(seen) <= 24
+        assert checkpoint.load() is None
+        assert checkpoint.worker(0).load() is None
+        assert checkpoint.worker(1).load() is None
+
+    def test_workers_close_all_connections(self):
+        opened = []
+        lock = threading.Lock()
+
+        def process(chunk):
+            chunk.update(bio="done")
+            # Each thread has its own connection objects
+            connections["other"].ensure_connection()
+            with lock:
+                opened.extend((connections["default"], connections["other"]))
+
+        Author.objects.iter_smart_chunks(workers=2).run(process)
+
+        assert opened
+        assert all(each.connection is None for each in opened)
+
+    def test_workers_in_transaction(self):
+        with atomic(), pytest.raises(ValueError) as excinfo:
+            Author.objects.iter_smart_chunks(workers=2).run(list)
+        assert str(excinfo.value) == (
+            "SmartChunkedIterator can't use multiple workers inside a transaction."
+        )
+
+    def test_iterating_with_workers(self):
+        with pytest.raises(ValueError) as excinfo:
+            list(Author.objects.iter_smart_chunks(workers=2))
+        assert str(excinfo.value) == (
+            "SmartChunkedIterator can only use multiple workers with run()."
+        )
+
+    def test_split_range(self):
+        iterator = Author.objects.iter_smart_chunks(workers=3)
+        assert iterator.split_range(1, 10) == [(1, 3), (4, 6), (7, 10)]
+        assert iterator.split_range(10, 1) == [(10, 8), (7, 5), (4, 1)]
+        assert iterator.split_range(5, 6) == [(5, 5), (6, 6)]
+
+    def test_reporting(self):
+        with captured_stdout() as output:
+            Author.objects.iter_smart_chunks(workers=2, report_progress=True).run(list)
+
+        lines = output.getvalue().split("\n")
+        reports = lines[0].split("\r")
+        for report in reports:
+            assert re.match(
+                r"^Author SmartChunkedIterator processed \d+/20 objects "
+                r"\(\d+\.\d+%\) in \d+ chunks *$",
+                report,
+            )
+        assert re.match(r"Finished! Iterated over 20 objects in [\dhms]+.", lines[1])
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Author.objects.bulk_create(
+            [Author(name=f"author{i % 4}", bio=str(i)) for i in range(11)]
+        )
+
+    def all_pages(self, paginator):
+        page = paginator.page()
+        pages = [list(page)]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            pages.append(list(page))
+        return page, pages
+
+    def test_forwards(self):
+        paginator = Author.objects.seek_paginate(3, ("name",))
+        assert paginator.ordering == ("name", "pk")
+
+        page, pages = self.all_pages(paginator)
+
+        assert [len(p) for p in pages] == [3, 3, 3, 2]
+        assert sum(pages, []) == list(Author.objects.order_by("name", "pk"))
+        assert not page.has_next()
+        assert page.next_cursor is None
+
+    def test_backwards(self):
+        paginator = Author.objects.seek_paginate(3, ("-name",))
+        page, pages = self.all_pages(paginator)
+
+        back_pages = [list(page)]
+        while page.has_previous():
+            page = paginator.page(page.previous_cursor)
+            back_pages.insert(0, list(page))
+
+        assert back_pages == pages
+        assert page.previous_cursor is None
+
+    def test_mixed_directions(self):
+        paginator = Author.objects.seek_paginate(4, ("name", "-bio"))
+        page, pages = self.all_pages(paginator)
+        assert sum(pages, []) == list(Author.objects.order_by("name", "-bio", "pk"))
+
+    def test_default_ordering(self):
+        paginator = Author.objects.order_by("-pk").seek_paginate(5)
+        assert paginator.ordering == ("-pk",)
+        page, pages = self.all_pages(paginator)
+        assert sum(pages, []) == list(Author.objects.order_by("-pk"))
+
+    def test_row_value_comparison(self):
+        paginator = Author.objects.seek_paginate(3, ("name",))
+        page = paginator.page()
+        with CaptureLastQuery() as cap:
+            paginator.page(page.next_cursor)
+        assert (
+            "(`testapp_author`.`name`, `testapp_author`.`id`) > ('author0', "
+            in cap.query
+        )
+
+    def test_count(self):
+        paginator = Author.objects.seek_paginate(3)
+        assert paginator.count == 11
+        assert paginator.num_pages == 4
+
+    def test_filtered(self):
+        paginator = Author.objects.filter(name="author1").seek_paginate(2)
+        page, pages = self.all_pages(paginator)
+        assert sum(pages, []) == list(Author.objects.filter(name="author1"))
+
+    def test_datetime_microseconds(self):
+        # All within one millisecond, so the cursor must keep microseconds
+        base = dt.datetime(2024, 1, 1, 12, 0, 0, 123000, tzinfo=dt.timezone.utc)
+        Author.objects.bulk_create(
+            [
+                Author(name="dated", birthday=base + dt.timedelta(microseconds=i))
+                for i in (4, 0, 3, 1, 2)
+            ]
+        )
+        authors = Author.objects.filter(name="dated")
+        paginator = authors.seek_paginate(2, ("birthday",))
+
+        page, pages = self.all_pages(paginator)
+
+        assert [len(p) for p in pages] == [2, 2, 1]
+        assert [a.birthday.microsecond for a in sum(pages, [])] == [
+            123000,
+            123001,
+            123002,
+            123003,
+            123004,
+        ]
+
+    def test_empty(self):
+        paginator = Author.objects.filter(name="nobody").seek_paginate(2)
+        page = paginator.page()
+        assert list(page) == []
+        assert not page.has_other_pages()
+        assert paginator.num_pages == 1
+
+    def test_invalid_cursor(self):
+        paginator = Author.objects.seek_paginate(2)
+        with pytest.raises(InvalidPage):
+            paginator.page("not a cursor")
+        # Too many values for the ordering
+        cursor = base64.urlsafe_b64encode(b"[false, [1, 2]]").decode()
+        with pytest.raises(InvalidPage):
+            paginator.page(cursor)
+
+    def test_invalid_cursor_values(self):
+        paginator = Author.objects.seek_paginate(2, ("birthday",))
+        for data in (
+            b'[false, ["not a date", 1]]',
+            b'[false, [null, "not a pk"]]',
+            b"[false, [null, [1]]]",
+        ):
+            cursor = base64.urlsafe_b64encode(data).decode()
+            with pytest.raises(InvalidPage):
+                paginator.page(cursor)
+
+    def test_values_not_supported(self):
+        with pytest.raises(ValueError) as excinfo:
+            Author.objects.values("name").seek_paginate(2)
+        assert str(excinfo.value) == (
+            "KeysetPaginator can only paginate model instances."
+        )
+
+    def test_random_ordering_not_supported(self):
+        with pytest.raises(ValueError):
+            Author.objects.order_by("?").seek_paginate(2)
+
+
 class VisualExplainTests(TestCase):
     @classmethod
     def setUpClass(cls):